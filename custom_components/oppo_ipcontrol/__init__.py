@@ -5,37 +5,110 @@ Custom component for controlling Oppo UDP-20x series media players (e.g., UDP-20
 import logging
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_HOST, CONF_NAME, EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, callback
 
-DOMAIN = "oppo_ipcontrol" 
-PLATFORMS = ["media_player"]
+from .const import DATA_DISCOVERY, DATA_HUB, DOMAIN
+from .discovery import OppoDiscovery
+from .hub import OppoHub
+from .services import async_setup_services
+
+PLATFORMS = ["media_player", "remote", "sensor", "select", "button"]
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the Oppo UDP-20x IP Control component."""
+    async_setup_services(hass)
+    await async_get_discovery(hass)
     return True
 
+async def async_get_discovery(hass: HomeAssistant) -> OppoDiscovery:
+    """Return the shared player discovery listener, starting it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    discovery = domain_data.get(DATA_DISCOVERY)
+    if discovery is not None:
+        return discovery
+    discovery = domain_data[DATA_DISCOVERY] = OppoDiscovery()
+    discovery.add_listener(
+        lambda announcement: _async_follow_player(hass, announcement)
+    )
+
+    @callback
+    def stop_discovery(event):
+        """Stop listening for player announcements when HA stops."""
+        discovery.async_stop()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_discovery)
+    await discovery.async_start()
+    return discovery
+
+def entry_host(entry: ConfigEntry) -> str:
+    """Return the current address of the player of a config entry."""
+    return entry.options.get(CONF_HOST, entry.data.get(CONF_HOST))
+
+def entry_unique_id(entry: ConfigEntry) -> str:
+    """Return the unique ID of the player device of a config entry."""
+    # Адрес при создании записи; не меняется вместе с текущим адресом плеера
+    return f"oppo_ipcontrol_{entry.data[CONF_HOST]}"
+
+@callback
+def _async_follow_player(hass: HomeAssistant, announcement):
+    """Learn player names and follow a player whose DHCP address changed."""
+    entries = hass.config_entries.async_entries(DOMAIN)
+    for entry in entries:
+        if entry_host(entry) == announcement.host:
+            if entry.data.get(CONF_NAME) != announcement.name:
+                hass.config_entries.async_update_entry(
+                    entry, data={**entry.data, CONF_NAME: announcement.name}
+                )
+            return
+
+    # Новый адрес: переносим запись, только если она одна с таким именем и без связи
+    hub = hass.data[DOMAIN].get(DATA_HUB)
+    candidates = [
+        entry
+        for entry in entries
+        if entry.data.get(CONF_NAME) == announcement.name
+        and not (hub is not None and hub.is_connected(entry.entry_id))
+    ]
+    if len(candidates) != 1:
+        return
+    entry = candidates[0]
+    _LOGGER.info(
+        "%s moved from %s to %s, updating the config entry",
+        announcement.name,
+        entry_host(entry),
+        announcement.host,
+    )
+    hass.config_entries.async_update_entry(
+        entry,
+        options={**entry.options, CONF_HOST: announcement.host},
+        title=f"Oppo UDP-20x {announcement.host}",
+    )
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Oppo UDP-20x IP Control from a config entry."""
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {
-        **entry.data,
-        CONF_HOST: entry.options.get(CONF_HOST, entry.data.get(CONF_HOST)),
-    }
+    hub = hass.data[DOMAIN].setdefault(DATA_HUB, OppoHub())
+    hass.data[DOMAIN][entry.entry_id] = {**entry.data, CONF_HOST: entry_host(entry)}
 
     async def on_hass_stop(event):
         """Clean up when HA stops for Oppo UDP-20x IP Control."""
         _LOGGER.debug("Home Assistant is stopping, cleaning up Oppo UDP-20x IP Control")
+        await hub.async_remove_player(entry.entry_id)
 
     entry.async_on_unload(
         hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, on_hass_stop)
     )
 
+    options = dict(entry.options)
+
     async def async_update_options(hass: HomeAssistant, updated_entry: ConfigEntry):
         """Reload the entry when options are updated."""
-        await hass.config_entries.async_reload(updated_entry.entry_id)
+        # Изменения data (например, имя плеера из оповещения) перезагрузки не требуют
+        if updated_entry.options != options:
+            await hass.config_entries.async_reload(updated_entry.entry_id)
 
     entry.async_on_unload(entry.add_update_listener(async_update_options))
 
@@ -47,6 +120,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        await hass.data[DOMAIN][DATA_HUB].async_remove_player(entry.entry_id)
     return unload_ok
 
 async def async_remove_config_entry_device(
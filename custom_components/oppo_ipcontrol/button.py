@@ -0,0 +1,55 @@
+"""Navigation buttons of the Oppo UDP-20x IP Control Protocol integration.
+
+One button per remote key used to move around the player's menus, so that
+dashboards and automations can press them without the send_command service.
+"""
+import logging
+
+from homeassistant.components.button import ButtonEntity
+
+from .entity import OppoEntity
+from .protocol import COMMANDS_BY_NAME
+
+_LOGGER = logging.getLogger(__name__)
+
+# Клавиши пульта для навигации по меню и значки их кнопок
+NAVIGATION_KEYS = {
+    "up": "mdi:arrow-up-bold",
+    "down": "mdi:arrow-down-bold",
+    "left": "mdi:arrow-left-bold",
+    "right": "mdi:arrow-right-bold",
+    "enter": "mdi:checkbox-blank-circle",
+    "return": "mdi:keyboard-return",
+    "home": "mdi:home",
+    "top_menu": "mdi:menu",
+    "popup_menu": "mdi:dots-vertical",
+    "option": "mdi:tune",
+    "info": "mdi:information-outline",
+    "setup": "mdi:cog",
+}
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the Oppo UDP-20x navigation buttons from a config entry."""
+    async_add_entities(
+        OppoNavigationButton(config_entry, COMMANDS_BY_NAME[name], icon)
+        for name, icon in NAVIGATION_KEYS.items()
+    )
+
+
+class OppoNavigationButton(OppoEntity, ButtonEntity):
+    """A navigation key of the Oppo UDP-20x remote."""
+
+    def __init__(self, config_entry, command, icon):
+        super().__init__(config_entry, f"key_{command.name}")
+        self._command = command.format()
+        self._attr_name = command.label
+        self._attr_icon = icon
+
+    async def async_press(self):
+        """Send the key to the player."""
+        player = self.player
+        if player is None:
+            _LOGGER.error(f"Cannot press {self._command}: the media player is not set up")
+            return
+        await player.async_send_custom_command(self._command)
@@ -0,0 +1,165 @@
+"""Serialized command scheduler for an Oppo UDP-20x player.
+
+All commands for a player go through one queue drained by a single worker:
+user actions are sent before queued poll queries, a queued ``#SVL`` is
+replaced by a newer one instead of sending every slider tick, and repeated
+navigation presses are sent back to back as one batch. A command whose
+callers have all given up waiting (cancelled, e.g. on a timeout) is dropped
+instead of being sent late.
+"""
+import asyncio
+import itertools
+import logging
+
+from .protocol import command_code
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_USER = 0
+PRIORITY_POLL = 1
+
+# Команды, для которых важно только последнее значение
+COALESCE_CODES = {"SVL"}
+# Навигационные клавиши, повторные нажатия которых отправляются пачкой
+BATCH_CODES = {
+    "NUP", "NDN", "NLT", "NRT", "SEL", "RET", "PUP", "PDN",
+    "VUP", "VDN", "NXT", "PRE",
+}
+
+
+class _QueuedCommand:
+    """A command waiting in the queue together with everyone waiting for it."""
+
+    __slots__ = ("command", "code", "expect_response", "priority", "order", "futures", "batch")
+
+    def __init__(self, command, code, expect_response, priority, order, batch=None):
+        self.command = command
+        self.batch = batch
+        self.code = code
+        self.expect_response = expect_response
+        self.priority = priority
+        self.order = order
+        self.futures = []
+
+
+class OppoCommandQueue:
+    """Send commands to one player in priority order, one at a time."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._queue = []
+        self._order = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        self._current = None
+        self._closed = False
+
+    async def async_send(self, command, expect_response=False, priority=PRIORITY_USER, hold=0):
+        """Queue a command and wait for its result (see OppoConnection.async_send).
+
+        With ``hold`` the command waits up to that many seconds for an
+        unreachable player to come back instead of failing at once.
+        """
+        if self._closed:
+            return False
+        if hold and not await self._connection.async_wait_connected(hold):
+            return False
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(command, expect_response, priority).futures.append(future)
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return await future
+
+    async def async_send_many(self, commands, priority=PRIORITY_POLL):
+        """Queue a batch of commands sent back to back (see OppoConnection.async_send_many)."""
+        if not commands:
+            return []
+        if self._closed:
+            return False
+        future = asyncio.get_running_loop().create_future()
+        entry = _QueuedCommand(
+            commands[0], None, True, priority, next(self._order), batch=list(commands)
+        )
+        entry.futures.append(future)
+        self._queue.append(entry)
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return await future
+
+    def _enqueue(self, command, expect_response, priority):
+        """Return the queue entry the command should be attached to."""
+        code = command_code(command)
+        if code in COALESCE_CODES:
+            for entry in self._queue:
+                if entry.code == code:
+                    _LOGGER.debug(f"Coalescing {entry.command} -> {command}")
+                    entry.command = command
+                    entry.expect_response |= expect_response
+                    entry.priority = min(entry.priority, priority)
+                    return entry
+        elif code in BATCH_CODES and self._queue:
+            last = max(self._queue, key=lambda entry: entry.order)
+            if last.command == command and last.priority == priority:
+                last.expect_response |= expect_response
+                return last
+        entry = _QueuedCommand(command, code, expect_response, priority, next(self._order))
+        self._queue.append(entry)
+        return entry
+
+    async def _run(self):
+        """Drain the queue, highest priority first."""
+        try:
+            while True:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                entry = min(self._queue, key=lambda item: (item.priority, item.order))
+                self._queue.remove(entry)
+                entry.futures = [future for future in entry.futures if not future.cancelled()]
+                if not entry.futures:
+                    _LOGGER.debug(f"Dropping {entry.command}: nobody waits for it any more")
+                    continue
+                self._current = entry
+                if entry.batch is not None:
+                    result = await self._connection.async_send_many(entry.batch)
+                    for future in entry.futures:
+                        if not future.done():
+                            future.set_result(result)
+                elif entry.code in BATCH_CODES:
+                    # Каждое нажатие отправляется отдельно, но без перерыва на опрос
+                    for future in entry.futures:
+                        if future.cancelled():
+                            continue
+                        result = await self._connection.async_send(
+                            entry.command, entry.expect_response
+                        )
+                        if not future.done():
+                            future.set_result(result)
+                else:
+                    result = await self._connection.async_send(
+                        entry.command, entry.expect_response
+                    )
+                    for future in entry.futures:
+                        if not future.done():
+                            future.set_result(result)
+                self._current = None
+        finally:
+            self._worker = None
+
+    async def async_close(self):
+        """Stop the worker and fail everything still queued."""
+        self._closed = True
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._current is not None:
+            self._queue.append(self._current)
+            self._current = None
+        for entry in self._queue:
+            for future in entry.futures:
+                if not future.done():
+                    future.set_result(False)
+        self._queue.clear()
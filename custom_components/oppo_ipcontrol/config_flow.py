@@ -4,66 +4,189 @@ Handles the configuration setup for Oppo UDP-20x series media players via
 IP Control Protocol in Home Assistant.
 """
 import logging
-import socket
 
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.const import CONF_HOST
-
-from . import DOMAIN
+from homeassistant.const import CONF_HOST, CONF_NAME
+
+from . import DOMAIN, async_get_discovery, entry_host
+from .connection import DEFAULT_PORT, async_probe
+from .const import (
+    CONF_FIRMWARE,
+    CONF_MODEL,
+    CONF_OFF_INTERVAL,
+    CONF_PLAY_INTERVAL,
+    CONF_VOLUME_INTERVAL,
+    DATA_HUB,
+    DEFAULT_OFF_INTERVAL,
+    DEFAULT_PLAY_INTERVAL,
+    DEFAULT_VOLUME_INTERVAL,
+)
+from .discovery import model_from_name
 
 _LOGGER = logging.getLogger(__name__)
-DEFAULT_HOST = "192.168.1.124"
-
-
-def _host_schema(default_host: str = DEFAULT_HOST) -> vol.Schema:
+# Значение выбора "ввести адрес вручную" в списке найденных плееров
+MANUAL_ENTRY = "manual"
+
+
+async def _async_probe(hass, host, port=DEFAULT_PORT):
+    """Identify the player at ``host``; return its status or None."""
+    # Хаб уже держит сессии настроенных плееров, через него проверка не открывает вторую
+    hub = hass.data.get(DOMAIN, {}).get(DATA_HUB)
+    if hub is not None:
+        status = await hub.async_probe(host, port)
+    else:
+        status = await async_probe(host, port)
+    if status is None:
+        _LOGGER.error("Failed to connect to %s", host)
+    else:
+        _LOGGER.debug("Found player at %s, firmware %s", host, status.firmware)
+    return status
+
+
+async def _async_device_data(hass, host, status, name=None):
+    """Return the entry data that describes the player hardware.
+
+    The model is read from the player's broadcast announcement ("OPPO
+    UDP-203" unless the player was renamed), falling back to ``name``. The
+    IP Control Protocol has no model query and the #QVR reply
+    (``UDP20X-xx-xxxx``) is the same for the whole series, so without an
+    announcement the model stays unset and the device shows the series.
+    """
+    announcement = (await async_get_discovery(hass)).players.get(host)
+    if announcement is not None:
+        name = announcement.name
+    data = {}
+    model = model_from_name(name)
+    if model:
+        data[CONF_MODEL] = model
+    if status.firmware:
+        data[CONF_FIRMWARE] = status.firmware
+    return data
+
+
+def _host_schema(default_host: str = None) -> vol.Schema:
     """Return the host configuration schema."""
+    if default_host is None:
+        return vol.Schema({vol.Required(CONF_HOST): str})
     return vol.Schema({vol.Required(CONF_HOST, default=default_host): str})
 
 
+def _options_schema(default_host: str, options: dict) -> vol.Schema:
+    """Return the options schema with the host and polling intervals."""
+    interval = vol.All(vol.Coerce(int), vol.Range(min=1, max=3600))
+    return _host_schema(default_host).extend(
+        {
+            vol.Required(
+                CONF_OFF_INTERVAL,
+                default=options.get(CONF_OFF_INTERVAL, DEFAULT_OFF_INTERVAL),
+            ): interval,
+            vol.Required(
+                CONF_PLAY_INTERVAL,
+                default=options.get(CONF_PLAY_INTERVAL, DEFAULT_PLAY_INTERVAL),
+            ): interval,
+            vol.Required(
+                CONF_VOLUME_INTERVAL,
+                default=options.get(CONF_VOLUME_INTERVAL, DEFAULT_VOLUME_INTERVAL),
+            ): interval,
+        }
+    )
+
+
 class OppoTelnetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Oppo UDP-20x IP Control."""
 
     VERSION = 1
 
+    def __init__(self):
+        """Initialize the config flow."""
+        self._discovered = {}
+
     async def async_step_user(self, user_input=None):
-        """Handle the initial step of Oppo UDP-20x IP Control configuration."""
+        """Offer the players found on the network or ask for an address."""
+        if user_input is None:
+            discovery = await async_get_discovery(self.hass)
+            configured = {
+                entry_host(entry) for entry in self._async_current_entries()
+            }
+            self._discovered = {
+                host: announcement
+                for host, announcement in discovery.players.items()
+                if host not in configured
+            }
+        if not self._discovered:
+            return await self.async_step_manual()
+
+        errors = {}
+        if user_input is not None:
+            host = user_input[CONF_HOST]
+            if host == MANUAL_ENTRY:
+                return await self.async_step_manual()
+            announcement = self._discovered[host]
+            status = await _async_probe(self.hass, host, announcement.port)
+            if status is not None:
+                return await self._async_create_player_entry(host, announcement.name, status)
+            errors["base"] = "cannot_connect"
+
+        players = {
+            host: f"{announcement.name} ({host})"
+            for host, announcement in self._discovered.items()
+        }
+        players[MANUAL_ENTRY] = "Enter IP address manually"
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema(
+                {vol.Required(CONF_HOST, default=next(iter(players))): vol.In(players)}
+            ),
+            errors=errors,
+        )
+
+    async def async_step_manual(self, user_input=None):
+        """Handle manual entry of the player address."""
         errors = {}
         if user_input is not None:
             host = user_input[CONF_HOST]
-            try:
-                await self.hass.async_add_executor_job(self._test_connection, host)
-                return self.async_create_entry(
-                    title=f"Oppo UDP-20x {host}", data={CONF_HOST: host}
+            status = await _async_probe(self.hass, host)
+            if status is not None:
+                announcement = self._discovered.get(host)
+                return await self._async_create_player_entry(
+                    host, announcement.name if announcement else None, status
                 )
-            except Exception as err:  # pylint: disable=broad-except
-                errors["base"] = "cannot_connect"
-                _LOGGER.error("Failed to connect to %s: %s", host, err)
+            errors["base"] = "cannot_connect"
 
         return self.async_show_form(
-            step_id="user",
+            step_id="manual",
             data_schema=_host_schema(),
             errors=errors,
         )
 
+    async def _async_create_player_entry(self, host, name, status):
+        """Create the config entry of a player."""
+        data = {CONF_HOST: host, **await _async_device_data(self.hass, host, status, name)}
+        if name:
+            data[CONF_NAME] = name
+        return self.async_create_entry(title=f"Oppo UDP-20x {host}", data=data)
+
     async def async_step_reconfigure(self, user_input=None):
         """Handle reconfiguration of an existing Oppo UDP-20x entry."""
         entry = self._get_reconfigure_entry()
-        current_host = entry.options.get(
-            CONF_HOST, entry.data.get(CONF_HOST, DEFAULT_HOST)
-        )
+        current_host = entry_host(entry)
         errors = {}
 
         if user_input is not None:
             host = user_input[CONF_HOST]
-            try:
-                await self.hass.async_add_executor_job(self._test_connection, host)
-            except Exception as err:  # pylint: disable=broad-except
+            status = await _async_probe(self.hass, host)
+            if status is None:
                 errors["base"] = "cannot_connect"
-                _LOGGER.error("Failed to connect to %s: %s", host, err)
             else:
                 self.hass.config_entries.async_update_entry(
                     entry,
+                    data={
+                        **entry.data,
+                        **await _async_device_data(
+                            self.hass, host, status, entry.data.get(CONF_NAME)
+                        ),
+                    },
                     options={**entry.options, CONF_HOST: host},
                     title=f"Oppo UDP-20x {host}",
                 )
@@ -81,16 +204,6 @@ class OppoTelnetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Create the options flow."""
         return OppoOptionsFlow(config_entry)
 
-    @staticmethod
-    def _test_connection(host):
-        """Test IP Control connection to the Oppo UDP-20x device."""
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)
-        try:
-            sock.connect((host, 23))
-        finally:
-            sock.close()
-
 
 class OppoOptionsFlow(config_entries.OptionsFlow):
     """Handle options for Oppo UDP-20x IP Control."""
@@ -101,28 +214,30 @@ class OppoOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage Oppo UDP-20x options."""
-        current_host = self._config_entry.options.get(
-            CONF_HOST, self._config_entry.data.get(CONF_HOST, DEFAULT_HOST)
-        )
+        current_host = entry_host(self._config_entry)
         errors = {}
 
         if user_input is not None:
             host = user_input[CONF_HOST]
-            try:
-                await self.hass.async_add_executor_job(
-                    OppoTelnetConfigFlow._test_connection, host
-                )
-            except Exception as err:  # pylint: disable=broad-except
+            status = await _async_probe(self.hass, host)
+            if status is None:
                 errors["base"] = "cannot_connect"
-                _LOGGER.error("Failed to connect to %s: %s", host, err)
             else:
+                entry = self._config_entry
                 self.hass.config_entries.async_update_entry(
-                    self._config_entry, title=f"Oppo UDP-20x {host}"
+                    entry,
+                    data={
+                        **entry.data,
+                        **await _async_device_data(
+                            self.hass, host, status, entry.data.get(CONF_NAME)
+                        ),
+                    },
+                    title=f"Oppo UDP-20x {host}",
                 )
-                return self.async_create_entry(title="", data={CONF_HOST: host})
+                return self.async_create_entry(title="", data=user_input)
 
         return self.async_show_form(
             step_id="init",
-            data_schema=_host_schema(current_host),
+            data_schema=_options_schema(current_host, self._config_entry.options),
             errors=errors,
         )
@@ -0,0 +1,435 @@
+"""Persistent IP Control Protocol connection to an Oppo UDP-20x player.
+
+Keeps one TCP session open per player, frames the received bytes on ``\\r``
+(a read may carry several messages or part of one) and matches each reply
+to the command that is waiting for it. Unsolicited status updates are
+handed to the registered update listeners. A dropped session is
+re-established in the background with exponential backoff.
+
+After several failed connects in a row the circuit breaker opens: commands
+fail at once instead of waiting out the connect timeout, and only the
+background reconnect keeps probing the player. ``wake`` switches the
+reconnect to a short interval for a while, e.g. when the player is being
+turned on.
+"""
+import asyncio
+import logging
+import random
+
+from .protocol import (
+    QUERY_FIRMWARE,
+    QUERY_POWER,
+    OppoLineParser,
+    command_code,
+    parse_status,
+)
+from .stats import (
+    COUNTER_CONNECT_FAILURES,
+    COUNTER_DISCONNECTS,
+    COUNTER_PARSE_FAILURES,
+    COUNTER_RECONNECTS,
+    COUNTER_TIMEOUTS,
+    OppoStats,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_PORT = 23
+CONNECT_TIMEOUT = 3
+WRITE_TIMEOUT = 1
+# Размер одного чтения из сокета; за одно чтение разбираются все пришедшие строки
+READ_SIZE = 4096
+RESPONSE_TIMEOUT = 2
+# Проверка адреса в мастере настройки: подключение и ответ, каждый не дольше
+PROBE_TIMEOUT = 1
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+RECONNECT_JITTER = 0.1
+# Число неудачных подключений подряд, после которого срабатывает предохранитель
+BREAKER_THRESHOLD = 3
+# Частые переподключения после wake(): длительность, интервал и таймаут подключения
+WAKE_DURATION = 15
+WAKE_RECONNECT_INTERVAL = 0.5
+WAKE_CONNECT_TIMEOUT = 1
+
+# Verbose mode 3 adds the command code to every response and enables
+# unsolicited status updates (@UPW, @UPL, @UVL, @UIS, ...) including the
+# per-second @UTC time code during playback
+VERBOSE_MODE = 3
+
+
+async def async_probe(host, port=DEFAULT_PORT, timeout=PROBE_TIMEOUT, connection=None):
+    """Check that ``host`` is an Oppo player and read its firmware version.
+
+    The power and firmware queries are sent back to back, over
+    ``connection`` if it is an open session to the player, otherwise over a
+    short-lived one. Returns the parsed status, or None if nothing at
+    ``host`` answers the IP Control Protocol.
+    """
+    queries = [QUERY_POWER, QUERY_FIRMWARE]
+    if connection is not None and connection.connected:
+        responses = await connection.async_send_many(queries)
+    else:
+        connection = OppoConnection(
+            host, port, connect_timeout=timeout, response_timeout=timeout
+        )
+        responses = None
+        try:
+            if await connection.async_connect():
+                responses = await connection.async_send_many(queries)
+        finally:
+            await connection.async_close()
+    if not responses or responses[0] is None:
+        _LOGGER.debug(f"Probe of {host}:{port} failed: {responses}")
+        return None
+    return parse_status(queries, responses)
+
+
+class OppoBackoff:
+    """Exponential reconnect backoff with a little jitter."""
+
+    def __init__(
+        self,
+        min_delay=RECONNECT_MIN_DELAY,
+        max_delay=RECONNECT_MAX_DELAY,
+        jitter=RECONNECT_JITTER,
+    ):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        """Return the delay before reconnect attempt number ``attempt`` (0-based)."""
+        delay = min(self.min_delay * 2 ** attempt, self.max_delay)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class OppoConnection:
+    """A single long-lived TCP session with an Oppo UDP-20x player.
+
+    By default a lost session is re-established by the connection itself.
+    If ``on_connection_lost`` is given, the caller owns the reconnect timer
+    instead and is expected to call ``async_connect`` when it fires.
+    """
+
+    def __init__(
+        self,
+        host,
+        port=DEFAULT_PORT,
+        backoff=None,
+        on_connection_lost=None,
+        connect_timeout=CONNECT_TIMEOUT,
+        response_timeout=RESPONSE_TIMEOUT,
+    ):
+        self._host = host
+        self._port = port
+        self._connect_timeout = connect_timeout
+        self._response_timeout = response_timeout
+        self._backoff = backoff or OppoBackoff()
+        self._on_connection_lost = on_connection_lost
+        self._reconnecting = False
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._reconnect_task = None
+        self._closed = False
+        # Протокол требует дождаться ответа перед отправкой следующей команды
+        self._command_lock = asyncio.Lock()
+        self._connect_lock = asyncio.Lock()
+        self._pending = []
+        # Сроки, до которых может прийти запоздалый ответ на команду с истёкшим ожиданием
+        self._stale = {}
+        self._sent_at = None
+        self._connected_once = False
+        self._failures = 0
+        self._wake_until = 0.0
+        self._connected_event = asyncio.Event()
+        self._update_listeners = []
+        self._connect_listeners = []
+        self.stats = OppoStats()
+
+    @property
+    def host(self):
+        """Return the player address."""
+        return self._host
+
+    @property
+    def connected(self):
+        """Return True if the TCP session is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    @property
+    def breaker_open(self):
+        """Return True while the player is considered unreachable."""
+        return self._failures >= BREAKER_THRESHOLD and not self.connected
+
+    @property
+    def waking(self):
+        """Return True while reconnects run at the short wake interval."""
+        return asyncio.get_running_loop().time() < self._wake_until
+
+    def wake(self, duration=WAKE_DURATION):
+        """Reconnect at a short interval for ``duration`` seconds."""
+        self._wake_until = asyncio.get_running_loop().time() + duration
+
+    def reconnect_delay(self, attempt):
+        """Return the delay before reconnect attempt number ``attempt``."""
+        if self.waking:
+            return WAKE_RECONNECT_INTERVAL
+        return self._backoff.delay(attempt)
+
+    async def async_wait_connected(self, timeout):
+        """Wait up to ``timeout`` seconds for the session to be open."""
+        if self.connected:
+            return True
+        try:
+            await asyncio.wait_for(self._connected_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.connected
+
+    def add_update_listener(self, listener):
+        """Call ``listener(message)`` for every status update; return remover."""
+        self._update_listeners.append(listener)
+        return lambda: self._update_listeners.remove(listener)
+
+    def add_connect_listener(self, listener):
+        """Call ``listener()`` after every (re)connect; return remover."""
+        self._connect_listeners.append(listener)
+        return lambda: self._connect_listeners.remove(listener)
+
+    async def async_connect(self):
+        """Open the session if it is not open yet."""
+        async with self._connect_lock:
+            if self.connected:
+                return True
+            if self._closed:
+                return False
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._host, self._port),
+                    timeout=WAKE_CONNECT_TIMEOUT if self.waking else self._connect_timeout,
+                )
+            except (OSError, asyncio.TimeoutError) as err:
+                _LOGGER.debug(f"Failed to connect to {self._host}: {err!r}")
+                self.stats.count(COUNTER_CONNECT_FAILURES, repr(err))
+                self._failures += 1
+                if self._failures == BREAKER_THRESHOLD:
+                    _LOGGER.debug(f"{self._host} is unreachable, failing commands fast")
+                return False
+            self._failures = 0
+            self._wake_until = 0.0
+            self._reader = reader
+            self._writer = writer
+            self._reconnecting = False
+            if self._connected_once:
+                self.stats.count(COUNTER_RECONNECTS)
+            self._connected_once = True
+            self._read_task = asyncio.create_task(self._read_loop(reader))
+            _LOGGER.debug(f"Connected to {self._host}:{self._port}")
+
+        responses = await self._request([f"#SVM {VERBOSE_MODE}"])
+        if not responses or responses[0] is None:
+            _LOGGER.debug(f"Failed to set verbose mode on {self._host}")
+        if not self.connected:
+            return False
+        self._connected_event.set()
+        for listener in list(self._connect_listeners):
+            listener()
+        return True
+
+    async def async_send(self, command, expect_response=False):
+        """Send a command and wait for its reply.
+
+        Returns the parsed reply if ``expect_response`` is set, otherwise True
+        once the command was written. Returns False on failure.
+        """
+        responses = await self.async_send_many([command])
+        if responses is False:
+            return False
+        if expect_response:
+            return responses[0] if responses[0] is not None else False
+        return True
+
+    async def async_send_many(self, commands):
+        """Send several commands back to back over the session and collect all replies.
+
+        Each command is written once the previous one has been answered, and
+        no other command gets in between. Returns a list of replies in
+        command order (None for a command that got no reply in time, and for
+        the commands after it), or False if the player is unreachable.
+        """
+        if not self.connected:
+            # Сессию восстанавливаем сразу, не дожидаясь фонового переподключения;
+            # таймаут не ждём, только когда сработал предохранитель
+            if self.breaker_open or not await self.async_connect():
+                self._schedule_reconnect()
+                return False
+        return await self._request(commands)
+
+    async def _request(self, commands):
+        """Send commands one at a time; return their replies (None on timeout) or False on error."""
+        async with self._command_lock:
+            replies = []
+            for command in commands:
+                reply = await self._request_one(command)
+                if reply is False:
+                    return False
+                replies.append(reply)
+                if reply is None:
+                    # Плеер не ответил: остальные команды пакета не отправляем
+                    replies += [None] * (len(commands) - len(replies))
+                    break
+            return replies
+
+    async def _request_one(self, command):
+        """Write one command and wait for its reply; return None on timeout, False on error."""
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return False
+        loop = asyncio.get_running_loop()
+        code = command_code(command)
+        future = loop.create_future()
+        self._pending = [(code, future)]
+        try:
+            self._sent_at = loop.time()
+            writer.write(f"{command}\r".encode())
+            await asyncio.wait_for(writer.drain(), timeout=WRITE_TIMEOUT)
+            return await asyncio.wait_for(future, timeout=self._response_timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.debug(f"Timeout waiting for reply to {command} from {self._host}")
+            self.stats.count(COUNTER_TIMEOUTS, code)
+            self._stale.setdefault(code, []).append(loop.time() + self._response_timeout)
+            return None
+        except (OSError, ConnectionError) as err:
+            _LOGGER.debug(f"Failed to send command {command}: {err!r}")
+            self._connection_lost()
+            return False
+        finally:
+            future.cancel()
+            self._pending = []
+
+    async def _read_loop(self, reader):
+        """Read the byte stream and hand each message to its handler."""
+        parser = OppoLineParser()
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    _LOGGER.debug(f"Connection to {self._host} closed by the player")
+                    break
+                messages, rejected = parser.feed(data)
+                for text in rejected:
+                    self.stats.count(COUNTER_PARSE_FAILURES, text)
+                for message in messages:
+                    if message.is_update:
+                        self._dispatch_update(message)
+                    else:
+                        self._dispatch_reply(message)
+        except asyncio.CancelledError:
+            raise
+        except OSError as err:
+            _LOGGER.debug(f"Connection to {self._host} lost: {err!r}")
+        self._read_task = None
+        self._connection_lost()
+
+    def _dispatch_reply(self, message):
+        """Resolve the pending command that ``message`` answers."""
+        if self._take_stale(message.code):
+            _LOGGER.debug(f"Dropping late reply from {self._host}: {message}")
+            return
+        for index, (code, future) in enumerate(self._pending):
+            if message.code is None or message.code == code:
+                del self._pending[index]
+                if not future.done():
+                    future.set_result(message)
+                    self.stats.record_latency(
+                        code, asyncio.get_running_loop().time() - self._sent_at
+                    )
+                return
+        _LOGGER.debug(f"Dropping unexpected reply from {self._host}: {message}")
+        self.stats.count(COUNTER_PARSE_FAILURES, f"unexpected {message.code}")
+
+    def _take_stale(self, code):
+        """Return True if a reply with ``code`` answers a command that timed out.
+
+        Replies come in the order the commands were sent, so a late reply
+        precedes the reply to the command now pending. Without a code
+        (verbose mode 0) any command that timed out may be the one answered.
+        """
+        now = asyncio.get_running_loop().time()
+        for key in [code] if code is not None else list(self._stale):
+            expiries = [expiry for expiry in self._stale.pop(key, ()) if expiry > now]
+            if expiries:
+                del expiries[0]
+                if expiries:
+                    self._stale[key] = expiries
+                return True
+        return False
+
+    def _dispatch_update(self, message):
+        """Hand an unsolicited status update to the listeners."""
+        for listener in list(self._update_listeners):
+            try:
+                listener(message)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(f"Error handling update {message} from {self._host}")
+
+    def _connection_lost(self):
+        """Drop the broken session and start reconnecting."""
+        self._connected_event.clear()
+        if self._writer is not None:
+            self.stats.count(COUNTER_DISCONNECTS)
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+        if self._read_task is not None:
+            self._read_task.cancel()
+            self._read_task = None
+        for _code, future in self._pending:
+            if not future.done():
+                future.set_exception(ConnectionError("Connection lost"))
+        self._pending = []
+        self._stale = {}
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self):
+        """Hand the reconnect to the owner or start the background reconnect loop."""
+        if self._closed or self._reconnecting:
+            return
+        self._reconnecting = True
+        if self._on_connection_lost is not None:
+            self._on_connection_lost()
+        elif self._reconnect_task is None:
+            self._reconnect_task = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        """Reconnect with exponential backoff until the session is back."""
+        attempt = 0
+        try:
+            while not self._closed:
+                await asyncio.sleep(self.reconnect_delay(attempt))
+                if await self.async_connect():
+                    _LOGGER.debug(f"Reconnected to {self._host}")
+                    return
+                attempt += 1
+        finally:
+            self._reconnect_task = None
+
+    async def async_close(self):
+        """Close the session and stop reconnecting."""
+        self._closed = True
+        self._connected_event.clear()
+        for task in (self._reconnect_task, self._read_task):
+            if task is not None:
+                task.cancel()
+        self._reconnect_task = None
+        self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (OSError, ConnectionError):
+                pass
+        self._reader = None
+        self._writer = None
@@ -0,0 +1,27 @@
+"""Constants for the Oppo UDP-20x IP Control Protocol integration."""
+
+DOMAIN = "oppo_ipcontrol"
+
+# Ключ общего хаба плееров в hass.data[DOMAIN]
+DATA_HUB = "hub"
+# Ключ общего слушателя UDP-оповещений плееров
+DATA_DISCOVERY = "discovery"
+# Ключ медиаплееров записей (entry_id -> сущность), от которых зависят сопутствующие сущности
+DATA_PLAYERS = "players"
+
+# Сигнал с новым снимком состояния плеера; форматируется entry_id записи
+SIGNAL_STATE = "oppo_ipcontrol_state_{}"
+
+# Модель и версия прошивки плеера, сохраняемые в записи при настройке
+CONF_MODEL = "model"
+CONF_FIRMWARE = "firmware"
+DEFAULT_MODEL = "UDP-20x Series"
+
+# Интервалы опроса (секунды), настраиваемые в параметрах интеграции
+CONF_OFF_INTERVAL = "off_interval"
+CONF_PLAY_INTERVAL = "play_interval"
+CONF_VOLUME_INTERVAL = "volume_interval"
+
+DEFAULT_OFF_INTERVAL = 15
+DEFAULT_PLAY_INTERVAL = 2
+DEFAULT_VOLUME_INTERVAL = 60
@@ -0,0 +1,21 @@
+"""Diagnostics support for the Oppo UDP-20x IP Control Protocol integration."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_HUB, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return the configuration and transport statistics of a player."""
+    hub = hass.data[DOMAIN][DATA_HUB]
+    stats = hub.stats(entry.entry_id)
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "connected": hub.is_connected(entry.entry_id),
+        "breaker_open": hub.breaker_open(entry.entry_id),
+        "stats": stats.as_dict() if stats is not None else None,
+    }
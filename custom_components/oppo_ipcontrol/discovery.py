@@ -0,0 +1,128 @@
+"""LAN discovery of Oppo UDP-20x players.
+
+Every player broadcasts a UDP notice about every 10 seconds while it is
+powered or in network standby::
+
+    Notify:OPPO Player Start
+    Server IP:192.168.1.124
+    Server Port:23
+    Server Name:OPPO UDP-203
+
+The listener keeps the players it has heard from recently and tells its
+listeners when a player appears or its address changes.
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import NamedTuple
+
+from .connection import DEFAULT_PORT
+
+_LOGGER = logging.getLogger(__name__)
+
+DISCOVERY_PORT = 7624
+ANNOUNCEMENT = "OPPO Player Start"
+# Модель в названии плеера по умолчанию ("OPPO UDP-203")
+MODEL_PATTERN = re.compile(r"\bUDP-20\d\b", re.IGNORECASE)
+# Плеер считается пропавшим, если пропустил три рассылки подряд
+STALE_AFTER = 35
+
+
+class OppoAnnouncement(NamedTuple):
+    """One "OPPO Player Start" notice."""
+
+    host: str
+    port: int
+    name: str
+
+
+def parse_announcement(data, sender):
+    """Parse a broadcast datagram; return None if it is not an Oppo notice."""
+    text = data.decode(errors="replace")
+    if ANNOUNCEMENT not in text:
+        return None
+    fields = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            fields[key.strip().lower()] = value.strip()
+    port = fields.get("server port", "")
+    return OppoAnnouncement(
+        # Адрес в тексте может быть пустым, тогда берём адрес отправителя
+        fields.get("server ip") or sender,
+        int(port) if port.isdigit() else DEFAULT_PORT,
+        fields.get("server name") or "OPPO UDP-20x",
+    )
+
+
+def model_from_name(name):
+    """Return the model in an announced player name, or None if it was renamed."""
+    match = MODEL_PATTERN.search(name or "")
+    return match.group(0).upper() if match else None
+
+
+class OppoDiscovery(asyncio.DatagramProtocol):
+    """Listen for player announcements on the local network."""
+
+    def __init__(self, port=DISCOVERY_PORT):
+        self._port = port
+        self._transport = None
+        self._players = {}
+        self._listeners = []
+
+    @property
+    def players(self):
+        """Return the players heard from recently, keyed by address."""
+        now = time.monotonic()
+        return {
+            host: announcement
+            for host, (announcement, seen) in self._players.items()
+            if now - seen < STALE_AFTER
+        }
+
+    def add_listener(self, listener):
+        """Call ``listener(announcement)`` for new or changed players; return remover."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def async_start(self):
+        """Bind the broadcast port; return False if it is not available."""
+        if self._transport is not None:
+            return True
+        loop = asyncio.get_running_loop()
+        try:
+            self._transport, _protocol = await loop.create_datagram_endpoint(
+                lambda: self,
+                local_addr=("0.0.0.0", self._port),
+                reuse_port=True,
+                allow_broadcast=True,
+            )
+        except (OSError, ValueError) as err:
+            _LOGGER.warning(f"Oppo discovery is unavailable on UDP port {self._port}: {err}")
+            return False
+        _LOGGER.debug(f"Listening for Oppo players on UDP port {self._port}")
+        return True
+
+    def async_stop(self):
+        """Stop listening."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def datagram_received(self, data, addr):
+        """Record an announcement and notify the listeners if it is news."""
+        announcement = parse_announcement(data, addr[0])
+        if announcement is None:
+            return
+        now = time.monotonic()
+        previous = self._players.get(announcement.host)
+        self._players[announcement.host] = (announcement, now)
+        if previous is not None and previous[0] == announcement and now - previous[1] < STALE_AFTER:
+            return
+        _LOGGER.debug(f"Discovered {announcement.name} at {announcement.host}")
+        for listener in list(self._listeners):
+            try:
+                listener(announcement)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(f"Error handling announcement {announcement}")
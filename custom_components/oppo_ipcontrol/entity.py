@@ -0,0 +1,107 @@
+"""Companion entities of an Oppo UDP-20x player.
+
+The media player entity owns the connection and the player state. Every
+time it writes a changed state it publishes an immutable snapshot of it
+over the dispatcher; sensors, selects and buttons of the same device read
+that snapshot instead of querying the player themselves, so adding them
+costs no extra traffic. Each companion writes its own HA state only when
+the part of the snapshot it shows has changed.
+"""
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+
+from homeassistant.components.media_player.const import MediaPlayerState
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import DeviceInfo, Entity
+
+from . import entry_unique_id
+from .const import (
+    CONF_FIRMWARE,
+    CONF_MODEL,
+    DATA_PLAYERS,
+    DEFAULT_MODEL,
+    DOMAIN,
+    SIGNAL_STATE,
+)
+
+
+@dataclass(frozen=True)
+class OppoSnapshot:
+    """The state of a player as last written by its media player entity."""
+
+    state: str = MediaPlayerState.OFF
+    volume: Optional[int] = None
+    muted: bool = False
+    source: Optional[str] = None
+    sources: Tuple[str, ...] = ()
+    media_info: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def powered(self):
+        return self.state != MediaPlayerState.OFF
+
+
+def device_info(config_entry):
+    """Return the device all entities of a player belong to."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry_unique_id(config_entry))},
+        name="Oppo UDP-20x",
+        manufacturer="Oppo",
+        model=config_entry.data.get(CONF_MODEL, DEFAULT_MODEL),
+        sw_version=config_entry.data.get(CONF_FIRMWARE),
+    )
+
+
+class OppoEntity(Entity):
+    """An entity that shows part of the state snapshot of a player."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, config_entry, key):
+        self._entry_id = config_entry.entry_id
+        self._attr_unique_id = f"{entry_unique_id(config_entry)}_{key}"
+        self._attr_device_info = device_info(config_entry)
+        self._snapshot = OppoSnapshot()
+        self._shown = None
+
+    @property
+    def player(self):
+        """Return the media player entity of the device, once it is set up."""
+        return self.hass.data[DOMAIN].get(DATA_PLAYERS, {}).get(self._entry_id)
+
+    @property
+    def available(self):
+        return self._snapshot.powered
+
+    def _value(self, snapshot):
+        """Return the part of the snapshot this entity shows."""
+        return None
+
+    async def async_added_to_hass(self):
+        """Take the current snapshot and follow the ones published later."""
+        # Платформы поднимаются в любом порядке: медиаплеера может ещё не быть
+        player = self.player
+        if player is not None:
+            self._update(player.snapshot)
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_STATE.format(self._entry_id), self._handle_snapshot
+            )
+        )
+
+    def _update(self, snapshot):
+        """Apply a snapshot; return True if the shown value changed."""
+        self._snapshot = snapshot
+        shown = (snapshot.powered, self._value(snapshot))
+        if shown == self._shown:
+            return False
+        self._shown = shown
+        return True
+
+    @callback
+    def _handle_snapshot(self, snapshot):
+        if self._update(snapshot):
+            self.async_write_ha_state()
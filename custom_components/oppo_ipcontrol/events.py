@@ -0,0 +1,131 @@
+"""Device events of the Oppo UDP-20x IP Control Protocol integration.
+
+Every status update the player pushes is fired on the HA event bus as an
+``oppo_ipcontrol_event`` with a ``type`` such as ``disc_loaded``,
+``chapter_changed`` or ``audio_changed``, so automations can react to the
+player directly instead of watching entity attributes. Bursts of the same
+event type (a volume ramp, skipping through chapters) are rate limited:
+within ``EVENT_MIN_INTERVAL`` only the last event of a type is fired, at
+the end of the interval, so the final value always arrives.
+"""
+import asyncio
+import logging
+
+from homeassistant.helpers import device_registry as dr
+
+from .const import DOMAIN
+from .protocol import parse_media_update, parse_status_update, parse_time_code
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_OPPO = "oppo_ipcontrol_event"
+# Минимальный интервал (секунды) между событиями одного типа
+EVENT_MIN_INTERVAL = 0.5
+
+# Коды @UPL, у которых есть собственный тип события
+UPL_EVENTS = {
+    "OPEN": "tray_opened",
+    "CLOS": "tray_closed",
+    "LOAD": "disc_loading",
+    "DISC": "no_disc",
+}
+# Типы событий для обновлений сведений о контенте
+MEDIA_EVENTS = {
+    "UDT": "disc_loaded",
+    "UAT": "audio_changed",
+    "UST": "subtitle_changed",
+    "UVO": "video_changed",
+    "UAR": "aspect_ratio_changed",
+}
+
+
+class OppoEventEmitter:
+    """Turn the status updates of one player into rate-limited HA events."""
+
+    def __init__(self, hass, entry_id, unique_id, host):
+        self._hass = hass
+        self._entry_id = entry_id
+        self._unique_id = unique_id
+        self._host = host
+        self._last_fired = {}
+        self._pending = {}
+        self._title_chapter = None
+
+    def handle_update(self, message):
+        """Fire the event of an unsolicited ``@U..`` update from the player."""
+        code, params = message.code, message.params.strip()
+        if code == "UPW":
+            self.fire("power_on" if parse_status_update(message).power else "power_off")
+        elif code == "UVL":
+            status = parse_status_update(message)
+            self.fire("volume_changed", volume=status.volume, muted=status.muted)
+        elif code == "UIS":
+            number, _, name = params.partition(" ")
+            self.fire("input_changed", input=number, name=name)
+        elif code == "UPL":
+            event_type = UPL_EVENTS.get(params)
+            if event_type is not None:
+                self.fire(event_type)
+            else:
+                self.fire("playback_changed", state=params.lower())
+        elif code == "UTC":
+            # @UTC приходит каждую секунду, событие — только при смене титула или главы
+            time_code = parse_time_code(params)
+            if time_code is None:
+                return
+            title_chapter = (time_code.title, time_code.chapter)
+            if title_chapter == self._title_chapter:
+                return
+            previous, self._title_chapter = self._title_chapter, title_chapter
+            if previous is not None and previous[0] == time_code.title:
+                self.fire("chapter_changed", title=time_code.title, chapter=time_code.chapter)
+            else:
+                self.fire("title_changed", title=time_code.title, chapter=time_code.chapter)
+        elif code in MEDIA_EVENTS:
+            if code == "UDT":
+                self._title_chapter = None
+            self.fire(MEDIA_EVENTS[code], **parse_media_update(message))
+
+    def fire(self, event_type, **data):
+        """Fire an event now, or at the end of the rate limit interval of its type."""
+        pending = self._pending.get(event_type)
+        if pending is not None:
+            # Событие этого типа уже ждёт: отправим его с последними данными
+            self._pending[event_type] = (pending[0], data)
+            return
+        loop = asyncio.get_running_loop()
+        last = self._last_fired.get(event_type)
+        wait = last + EVENT_MIN_INTERVAL - loop.time() if last is not None else 0
+        if wait > 0:
+            handle = loop.call_later(wait, self._fire_pending, event_type)
+            self._pending[event_type] = (handle, data)
+            return
+        self._fire(event_type, data)
+
+    def _fire_pending(self, event_type):
+        _handle, data = self._pending.pop(event_type)
+        self._fire(event_type, data)
+
+    def _fire(self, event_type, data):
+        self._last_fired[event_type] = asyncio.get_running_loop().time()
+        if self._hass is None:
+            # Плеер работает без HA (tools/benchmark.py)
+            return
+        device = dr.async_get(self._hass).async_get_device(
+            identifiers={(DOMAIN, self._unique_id)}
+        )
+        event_data = {
+            "type": event_type,
+            "entry_id": self._entry_id,
+            "device_id": device.id if device is not None else None,
+            "host": self._host,
+            **{key: value for key, value in data.items() if value is not None},
+        }
+        _LOGGER.debug(f"Firing {EVENT_OPPO}: {event_data}")
+        self._hass.bus.async_fire(EVENT_OPPO, event_data)
+
+    def cancel(self):
+        """Drop the events still waiting out their rate limit."""
+        for handle, _data in self._pending.values():
+            handle.cancel()
+        self._pending.clear()
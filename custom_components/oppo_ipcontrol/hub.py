@@ -0,0 +1,250 @@
+"""Domain-level hub shared by all Oppo UDP-20x players.
+
+The hub owns the connection and command queue of every configured player,
+their poll schedules and their reconnect timers. A single background task
+sleeps until the earliest poll or reconnect is due, so adding players does
+not add free-running loops: players that become due close together are
+served by the same wakeup, players are staggered when they are added and
+their poll intervals are jittered, and all of them share one reconnect
+backoff policy. The first poll of a player is its initial refresh, so
+setting up an entry never waits for the player.
+"""
+import asyncio
+import logging
+import random
+
+from .command_queue import OppoCommandQueue
+from .connection import DEFAULT_PORT, OppoBackoff, OppoConnection, async_probe
+from .stats import COUNTER_POLL_ERRORS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Смещение первого опроса каждого следующего плеера
+POLL_STAGGER = 0.5
+# Всё, что становится due в пределах этого окна, обслуживается одним пробуждением
+WAKE_WINDOW = 0.25
+# Случайное отклонение интервала опроса, чтобы плееры не опрашивались синхронно
+POLL_JITTER = 0.1
+
+
+class _HubPlayer:
+    """Everything the hub tracks for one player."""
+
+    __slots__ = (
+        "connection",
+        "commands",
+        "poll",
+        "poll_due",
+        "poll_task",
+        "reconnect_attempt",
+        "reconnect_due",
+        "reconnect_task",
+    )
+
+    def __init__(self, connection, commands):
+        self.connection = connection
+        self.commands = commands
+        self.poll = None
+        self.poll_due = None
+        self.poll_task = None
+        self.reconnect_attempt = 0
+        self.reconnect_due = None
+        self.reconnect_task = None
+
+
+class OppoHub:
+    """Owns the connections, poll schedules and reconnect timers of all players."""
+
+    def __init__(self, backoff=None):
+        self.backoff = backoff or OppoBackoff()
+        self._players = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def add_player(self, key, host, port=DEFAULT_PORT):
+        """Create the connection and command queue for a player."""
+        connection = OppoConnection(
+            host,
+            port,
+            backoff=self.backoff,
+            on_connection_lost=lambda: self._schedule_reconnect(key),
+        )
+        player = _HubPlayer(connection, OppoCommandQueue(connection))
+        self._players[key] = player
+        return player.connection, player.commands
+
+    def is_connected(self, key):
+        """Return True if the session of a player is open."""
+        player = self._players.get(key)
+        return player is not None and player.connection.connected
+
+    def breaker_open(self, key):
+        """Return True while a player is considered unreachable."""
+        player = self._players.get(key)
+        return player is not None and player.connection.breaker_open
+
+    def stats(self, key):
+        """Return the transport statistics of a player, or None if it is unknown."""
+        player = self._players.get(key)
+        return player.connection.stats if player is not None else None
+
+    async def async_probe(self, host, port=DEFAULT_PORT):
+        """Identify the player at ``host``, reusing its open session if there is one."""
+        # Второе подключение к уже подключённому плееру не нужно
+        connection = next(
+            (
+                player.connection
+                for player in self._players.values()
+                if player.connection.host == host and player.connection.connected
+            ),
+            None,
+        )
+        return await async_probe(host, port, connection=connection)
+
+    def register_poll(self, key, poll):
+        """Start polling a player.
+
+        ``poll`` is a coroutine function that runs the due status queries and
+        returns the number of seconds until it wants to run again.
+        """
+        player = self._players[key]
+        player.poll = poll
+        stagger = POLL_STAGGER * sum(
+            1 for other in self._players.values() if other.poll is not None and other is not player
+        )
+        player.poll_due = asyncio.get_running_loop().time() + stagger
+        self._ensure_running()
+
+    def unregister_poll(self, key):
+        """Stop polling a player."""
+        player = self._players.get(key)
+        if player is None:
+            return
+        player.poll = None
+        player.poll_due = None
+        if player.poll_task is not None:
+            player.poll_task.cancel()
+
+    def request_poll(self, key):
+        """Poll a player as soon as possible."""
+        player = self._players.get(key)
+        if player is None or player.poll is None:
+            return
+        player.poll_due = 0.0
+        self._wakeup.set()
+
+    def wake(self, key):
+        """Reconnect to an unreachable player right away and then at a short interval."""
+        player = self._players.get(key)
+        if player is None or player.connection.connected:
+            return
+        player.connection.wake()
+        if player.reconnect_task is None:
+            player.reconnect_due = asyncio.get_running_loop().time()
+        self._ensure_running()
+
+    def _schedule_reconnect(self, key):
+        """Arm the reconnect timer of a player after its session was lost."""
+        player = self._players.get(key)
+        if player is None or player.reconnect_due is not None:
+            return
+        delay = player.connection.reconnect_delay(player.reconnect_attempt)
+        player.reconnect_due = asyncio.get_running_loop().time() + delay
+        _LOGGER.debug(f"Reconnecting to {player.connection.host} in {delay:.1f}s")
+        self._ensure_running()
+
+    def _ensure_running(self):
+        """Start the shared background task if it is not running."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    async def _run(self):
+        """Serve due polls and reconnects of all players from one task."""
+        loop = asyncio.get_running_loop()
+        try:
+            while self._players:
+                now = loop.time()
+                pending = []
+                for key, player in self._players.items():
+                    if player.reconnect_due is not None and player.reconnect_task is None:
+                        if player.reconnect_due <= now + WAKE_WINDOW:
+                            player.reconnect_task = asyncio.create_task(
+                                self._async_reconnect(key, player)
+                            )
+                        else:
+                            pending.append(player.reconnect_due)
+                    if player.poll_due is not None and player.poll_task is None:
+                        if player.poll_due <= now + WAKE_WINDOW:
+                            player.poll_due = None
+                            player.poll_task = asyncio.create_task(self._async_poll(player))
+                        else:
+                            pending.append(player.poll_due)
+                self._wakeup.clear()
+                timeout = max(min(pending) - loop.time(), 0) if pending else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._task = None
+
+    async def _async_poll(self, player):
+        """Run one poll of a player and schedule the next one."""
+        loop = asyncio.get_running_loop()
+        delay = None
+        started = loop.time()
+        try:
+            delay = await player.poll()
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.exception(f"Error polling {player.connection.host}")
+            player.connection.stats.count(COUNTER_POLL_ERRORS, repr(err))
+        finally:
+            player.poll_task = None
+        player.connection.stats.record_poll(loop.time() - started)
+        # poll_due уже выставлен, если во время опроса пришёл request_poll
+        if player.poll is not None and player.poll_due is None:
+            if delay is None:
+                delay = POLL_STAGGER
+            player.poll_due = loop.time() + delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        self._wakeup.set()
+
+    async def _async_reconnect(self, key, player):
+        """Try to re-establish a lost session."""
+        loop = asyncio.get_running_loop()
+        player.reconnect_due = None
+        try:
+            connected = await player.connection.async_connect()
+        finally:
+            player.reconnect_task = None
+        if connected:
+            player.reconnect_attempt = 0
+            _LOGGER.debug(f"Reconnected to {player.connection.host}")
+        elif key in self._players and player.reconnect_due is None:
+            player.reconnect_attempt += 1
+            player.reconnect_due = loop.time() + player.connection.reconnect_delay(
+                player.reconnect_attempt
+            )
+        self._wakeup.set()
+
+    async def async_remove_player(self, key):
+        """Cancel everything of a player and close its connection."""
+        player = self._players.pop(key, None)
+        if player is None:
+            return
+        for task in (player.poll_task, player.reconnect_task):
+            if task is not None:
+                task.cancel()
+        await player.commands.async_close()
+        await player.connection.async_close()
+        if not self._players and self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._wakeup.set()
+
+    async def async_shutdown(self):
+        """Remove all players."""
+        for key in list(self._players):
+            await self.async_remove_player(key)
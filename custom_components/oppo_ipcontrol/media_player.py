@@ -4,124 +4,220 @@ Custom integration for controlling Oppo UDP-20x series (e.g., UDP-203, UDP-205)
 Supports power, volume, playback, navigation, and source selection.
 """
 import asyncio
-import socket
+from dataclasses import replace
 from homeassistant.components.media_player import MediaPlayerEntity, MediaPlayerDeviceClass
 from homeassistant.components.media_player.const import (
     MediaPlayerEntityFeature,
     MediaPlayerState,
 )
 from homeassistant.const import CONF_HOST
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.core import SupportsResponse
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util import dt as dt_util
 import logging
+from types import MappingProxyType
 import voluptuous as vol
 
-DOMAIN = "oppo_ipcontrol"
+from . import entry_unique_id
+from .command_queue import PRIORITY_POLL, PRIORITY_USER
+from .connection import DEFAULT_PORT, WAKE_DURATION
+from .const import DATA_HUB, DATA_PLAYERS, DOMAIN, SIGNAL_STATE
+from .entity import OppoSnapshot, device_info
+from .events import OppoEventEmitter
+from .hub import WAKE_WINDOW
+from .optimistic import CONFIRM_TIMEOUT, POWER_CONFIRM_TIMEOUT, OppoOptimisticState
+from .poll_scheduler import OppoPollScheduler
+from .scene import OppoScene, plan_restore
+from .stats import COUNTER_POLL_ERRORS
+from .protocol import (
+    QUERY_AUDIO,
+    QUERY_HDR,
+    QUERY_PLAYBACK,
+    QUERY_POWER,
+    QUERY_SOURCE,
+    QUERY_SUBTITLE,
+    QUERY_TITLE,
+    QUERY_TITLE_ELAPSED,
+    QUERY_TITLE_REMAINING,
+    QUERY_VOLUME,
+    MEDIA_INFO_QUERIES,
+    COMMANDS_BY_NAME,
+    MEDIA_UPDATE_CODES,
+    STATUS_UPDATE_CODES,
+    build_command,
+    parse_media_update,
+    parse_reply,
+    parse_status,
+    parse_status_update,
+    parse_time_code,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
-# Регистрация кастомного сервиса
-SERVICE_SEND_COMMAND = "send_command"
+SERVICE_SEND_SEQUENCE = "send_sequence"
+SERVICE_SNAPSHOT = "snapshot"
+SERVICE_RESTORE = "restore"
+
+# Шаг последовательности: команда строкой или с числом повторов и паузой
+SEQUENCE_STEP_SCHEMA = vol.Any(
+    cv.string,
+    vol.Schema({
+        vol.Required("command"): cv.string,
+        vol.Optional("repeat", default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+        vol.Optional("delay"): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+    }),
+)
+SEND_SEQUENCE_SCHEMA = {
+    vol.Required("commands"): vol.All(cv.ensure_list, [SEQUENCE_STEP_SCHEMA]),
+    vol.Optional("delay", default=0): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+    vol.Optional("stop_on_error", default=True): cv.boolean,
+}
+
+# Соответствие кодов @UPL и состояний плеера
+UPL_TO_STATE = {
+    "PLAY": MediaPlayerState.PLAYING,
+    "PAUS": MediaPlayerState.PAUSED,
+    "STPF": MediaPlayerState.PAUSED,
+    "STPR": MediaPlayerState.PAUSED,
+    "FFW": MediaPlayerState.PLAYING,
+    "FRV": MediaPlayerState.PLAYING,
+    "SFW": MediaPlayerState.PLAYING,
+    "SRV": MediaPlayerState.PLAYING,
+}
+
+# Соответствие ответов #QPL и состояний плеера
+QPL_TO_STATE = {
+    "PLAY": MediaPlayerState.PLAYING,
+    "PAUSE": MediaPlayerState.PAUSED,
+    "STOP": MediaPlayerState.IDLE,
+    "STEP": MediaPlayerState.PAUSED,
+    "FFWD": MediaPlayerState.PLAYING,
+    "FREV": MediaPlayerState.PLAYING,
+    "SFWD": MediaPlayerState.PLAYING,
+    "SREV": MediaPlayerState.PLAYING,
+}
+
+# Номера входов #QIS/#SIS и названия источников в карточке;
+# аудиовходы 3-5 есть только у UDP-205, UDP-203 отвечает на них @SIS ER
+QIS_TO_SOURCE = {
+    "0": "Disc",
+    "1": "HDMI In",
+    "2": "ARC: HDMI Out",
+    "3": "Optical In",
+    "4": "Coaxial In",
+    "5": "USB Audio In",
+}
+SOURCE_TO_QIS = {source: number for number, source in QIS_TO_SOURCE.items()}
+# Входы, наличие которых зависит от модели
+MODEL_DEPENDENT_INPUTS = ("3", "4", "5")
+# Состояния плеера в снимке сцены в терминах #QPL
+STATE_TO_QPL = {
+    MediaPlayerState.PLAYING: "PLAY",
+    MediaPlayerState.PAUSED: "PAUSE",
+    MediaPlayerState.IDLE: "STOP",
+}
+
+# Запросы полного обновления состояния, отправляемые одним пакетом
+FULL_REFRESH = (QUERY_POWER, QUERY_VOLUME, QUERY_SOURCE, QUERY_PLAYBACK)
+
+# Состояния, в которых у плеера есть позиция воспроизведения
+PLAYBACK_STATES = (MediaPlayerState.PLAYING, MediaPlayerState.PAUSED)
+# Как часто (секунды) перепроверять питание через #QPW, ожидая включения плеера
+POWER_WAIT_INTERVAL = 1
+# Допустимое расхождение (секунды) между @UTC и позицией, которую интерполирует HA
+POSITION_DRIFT = 2
+# Коды @UPL, после которых в плеере может оказаться другой диск
+UPL_DISC_CHANGE = ("DISC", "LOAD", "OPEN", "CLOS")
+# Изменения, пришедшие в пределах этого окна (секунды), записываются в HA одним состоянием
+WRITE_DEBOUNCE = 0.05
+# Запросы, которыми проверяется неподтверждённый оптимистичный результат команды
+VERIFY_QUERIES = {
+    "power": QUERY_POWER,
+    "playback": QUERY_PLAYBACK,
+    "muted": QUERY_VOLUME,
+    "source": QUERY_SOURCE,
+}
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Oppo UDP-20x IP Control Protocol media player from a config entry."""
     host = config_entry.options.get(CONF_HOST, config_entry.data[CONF_HOST])
-    unique_id = f"oppo_ipcontrol_{config_entry.data[CONF_HOST]}"
-    player = OppoIPControlMediaPlayer(host, unique_id)
+    unique_id = entry_unique_id(config_entry)
+    hub = hass.data[DOMAIN][DATA_HUB]
+    player = OppoIPControlMediaPlayer(
+        host, unique_id, hub, config_entry.entry_id, config_entry.options,
+        device=device_info(config_entry),
+    )
+    # Сопутствующие сущности находят медиаплеер своей записи здесь
+    hass.data[DOMAIN].setdefault(DATA_PLAYERS, {})[config_entry.entry_id] = player
+    # Первое обновление состояния выполняет хаб в фоне, сразу после добавления сущности
     async_add_entities([player])
 
-    # Вызываем начальную проверку состояния перед запуском периодического опроса
-    await player.async_update_source_and_state()
-    hass.async_create_task(player.async_poll_status())
-
-    # Определение схемы данных для службы с двумя полями
-    service_schema = vol.Schema({
-        vol.Optional("preset_command"): str,
-        vol.Optional("custom_command"): str,
-    })
-
-    # Регистрация сервиса с описанием параметров
-    async def handle_send_command(call):
-        """Handle the send_command service for Oppo UDP-20x."""
-        preset_command = call.data.get("preset_command")
-        custom_command = call.data.get("custom_command")
-
-        # Определяем, какая команда используется
-        if preset_command and preset_command in player._command_map:
-            command_to_send = player._command_map[preset_command]
-            _LOGGER.debug(f"Using preset command: {preset_command} -> {command_to_send}")
-            await player.async_send_custom_command(command_to_send)
-        elif custom_command:
-            # Проверяем, что кастомная команда не пустая
-            if not custom_command.strip():
-                _LOGGER.warning("Custom command is empty")
-                return
-
-            # Добавляем #, если оно отсутствует в начале команды
-            command_to_send = custom_command.strip()
-            if not command_to_send.startswith("#"):
-                command_to_send = f"#{command_to_send}"
-
-            _LOGGER.debug(f"Using custom command: {command_to_send}")
-            await player.async_send_custom_command(command_to_send)
-        else:
-            _LOGGER.warning("No preset or custom command provided for send_command service")
-
-    hass.services.async_register(
-        DOMAIN,
-        SERVICE_SEND_COMMAND,
-        handle_send_command,
-        schema=service_schema
+    # Последовательность команд адресуется конкретному плееру и возвращает подтверждения шагов
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SEND_SEQUENCE,
+        SEND_SEQUENCE_SCHEMA,
+        "async_send_sequence",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    # Снимок сцены хранится в сущности до следующего снимка или перезапуска HA
+    platform.async_register_entity_service(
+        SERVICE_SNAPSHOT, {}, "async_snapshot", supports_response=SupportsResponse.OPTIONAL
+    )
+    platform.async_register_entity_service(
+        SERVICE_RESTORE, {}, "async_restore", supports_response=SupportsResponse.OPTIONAL
     )
 
 
 class OppoIPControlMediaPlayer(MediaPlayerEntity):
     """Representation of an Oppo UDP-20x IP Control Protocol media player."""
 
-    def __init__(self, host, unique_id):
+    def __init__(
+        self, host, unique_id, hub, hub_key, options=None, port=DEFAULT_PORT, device=None
+    ):
         self._host = host
         self._unique_id = unique_id
-        self._port = 23
+        self._device = device
+        self._port = port
         self._state = MediaPlayerState.OFF
         self._volume = 0.0
         self._volume_oppo = 0  # Громкость в формате Oppo (0-100)
         self._is_muted = False
-        self._running = True
         self._current_source = None
+        # Входы, которые плеер отклонил (нет у этой модели)
+        self._unsupported_sources = set()
         self._last_power_command = None
-        # Внутренний словарь команд IP Control Protocol (только навигация)
-        self._command_map = {
-            "up": "#NUP",
-            "down": "#NDN",
-            "left": "#NLT",
-            "right": "#NRT",
-            "enter": "#SEL",
-            "home": "#HOM"
-        }
-        # Атрибуты с описаниями для отображения в HA
-        self._attributes = {
-            "up": "Move cursor up",
-            "down": "Move cursor down",
-            "left": "Move cursor left",
-            "right": "Move cursor right",
-            "enter": "Select/Enter",
-            "home": "Return to home screen",
-            "volume_level_oppo": self._volume_oppo
-        }
-        # Список источников для выбора в карточке
+        self._media_position = None
+        self._media_duration = None
+        self._media_position_updated_at = None
+        self._media_title_number = None
+        # Сведения о текущем диске; неизменные поля запрашиваются один раз на диск
+        self._media_info = {}
+        # Растёт при каждой замене _media_info; по нему, а не по id(), видно изменение
+        self._media_info_version = 0
+        self._disc_info_loaded = False
+        # Отложенная запись состояния в HA и последний записанный снимок
+        self._write_handle = None
+        self._written_snapshot = None
+        # Фоновые синхронизации позиции и HDR, отменяются при удалении сущности
+        self._sync_tasks = set()
+        self._events = None
+        self._scene = None
+        # Питание, подтверждённое самим плеером (@UPW 1 или ответ #QPW), а не оптимистично
+        self._powered = asyncio.Event()
+        self._published = OppoSnapshot()
+        self._extra_attributes = None
+        self._extra_attributes_key = None
+        self._hub = hub
+        self._hub_key = hub_key
+        self._connection, self._commands = hub.add_player(hub_key, host, self._port)
+        self._scheduler = OppoPollScheduler.from_options(options or {})
+        # Ожидаемые результаты команд и таймеры их проверки
+        self._optimistic = OppoOptimisticState()
+        self._verify_handles = {}
         self._state_update_pending = False  # Флаг для отслеживания ожидающих обновлений состояния
-        self._source_list = ["Disc", "HDMI In", "ARC: HDMI Out"]
-        # Соответствие источников и команд #SIS
-        self._source_to_command = {
-            "Disc": "#SIS 0",
-            "HDMI In": "#SIS 1",
-            "ARC: HDMI Out": "#SIS 2"
-        }
-        # Соответствие ответов #QIS и источников
-        self._qis_to_source = {
-            "0": "Disc",
-            "1": "HDMI In",
-            "2": "ARC: HDMI Out"
-        }
 
     @property
     def unique_id(self):
@@ -143,6 +239,21 @@ class OppoIPControlMediaPlayer(MediaPlayerEntity):
     def is_volume_muted(self):
         return self._is_muted
 
+    @property
+    def media_position(self):
+        """Return the title elapsed time in seconds."""
+        return self._media_position
+
+    @property
+    def media_duration(self):
+        """Return the title length in seconds."""
+        return self._media_duration
+
+    @property
+    def media_position_updated_at(self):
+        """Return when the position was last synced with the player."""
+        return self._media_position_updated_at
+
     @property
     def device_class(self):
         return MediaPlayerDeviceClass.TV
@@ -161,6 +272,7 @@ class OppoIPControlMediaPlayer(MediaPlayerEntity):
                 | MediaPlayerEntityFeature.PREVIOUS_TRACK
                 | MediaPlayerEntityFeature.VOLUME_STEP
                 | MediaPlayerEntityFeature.SELECT_SOURCE
+                | MediaPlayerEntityFeature.SEEK
         )
 
     @property
@@ -171,327 +283,764 @@ class OppoIPControlMediaPlayer(MediaPlayerEntity):
     @property
     def source_list(self):
         """Return the list of available sources."""
-        return self._source_list
+        return [
+            source for source in QIS_TO_SOURCE.values()
+            if source not in self._unsupported_sources
+        ]
 
     @property
     def device_info(self):
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.unique_id)},
-            name=self.name,
-            manufacturer="Oppo",
-            model="UDP-20x Series",
-        )
+        return self._device
+
+    @property
+    def snapshot(self):
+        """Return the state last written to HA, as shown by the companion entities."""
+        return self._published
 
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
-        self._attributes["volume_level_oppo"] = self._volume_oppo
-        return self._attributes
-
-    async def async_update_source_and_state(self):
-        """Update the device state and source at startup."""
-        try:
-            # Проверяем состояние питания
-            power_status = await self._send_command("#QPW", expect_response=True)
-            _LOGGER.debug(f"Initial power status response: {power_status}")
-
-            if power_status and "ON" in power_status.upper():
-                self._state = MediaPlayerState.IDLE
-                # Проверяем текущий источник
-                source_status = await self._send_command("#QIS", expect_response=True)
-                if source_status and "@OK" in source_status:
-                    try:
-                        source_parts = source_status.split()
-                        if len(source_parts) > 1 and source_parts[1] in self._qis_to_source:
-                            self._current_source = self._qis_to_source[source_parts[1]]
-                            _LOGGER.debug(f"Initial source updated to {self._current_source}")
-                    except (ValueError, IndexError):
-                        _LOGGER.warning(f"Failed to parse initial source from response: {source_status}")
-                # Обновляем громкость
-                await self._update_volume()
-            else:
-                self._state = MediaPlayerState.OFF
-                self._current_source = None
+        key = (self._volume_oppo, self._media_info_version)
+        if key != self._extra_attributes_key:
+            self._extra_attributes_key = key
+            self._extra_attributes = {
+                "volume_level_oppo": self._volume_oppo,
+                **self._media_info,
+            }
+        return self._extra_attributes
 
-            self.async_write_ha_state()
-        except Exception as e:
-            _LOGGER.error(f"Error updating initial state and source: {e}")
-            self._state = MediaPlayerState.OFF
-            self._current_source = None
-            self.async_write_ha_state()
+    async def async_added_to_hass(self):
+        """Subscribe to unsolicited status updates from the player."""
+        self.async_on_remove(
+            self._connection.add_update_listener(self._handle_update)
+        )
+        # События автоматизаций идут прямо из обновлений соединения, в обход состояния сущности
+        self._events = OppoEventEmitter(self.hass, self._hub_key, self.unique_id, self._host)
+        self.async_on_remove(
+            self._connection.add_update_listener(self._events.handle_update)
+        )
+        self.async_on_remove(self._events.cancel)
+        self.async_on_remove(
+            self._connection.add_connect_listener(self._request_resync)
+        )
+        self._hub.register_poll(self._hub_key, self.async_poll)
 
-    async def _send_command(self, command, expect_response=False):
-        """Send an IP Control Protocol command to the Oppo UDP-20x device."""
-        try:
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(self._host, self._port),
-                timeout=3
+    def _request_resync(self):
+        """Run every status query on the next poll cycle (e.g. after a reconnect)."""
+        for query in (QUERY_POWER, QUERY_VOLUME, QUERY_SOURCE, QUERY_PLAYBACK):
+            self._scheduler.request(query)
+        self._hub.request_poll(self._hub_key)
+
+    def _handle_update(self, message):
+        """Apply an unsolicited @U.. status update from the player."""
+        code, params = message.code, message.params.strip()
+        _LOGGER.debug(f"Status update: {code} {params}")
+        if code in STATUS_UPDATE_CODES:
+            # Питание, громкость и вход применяются так же, как ответы на запросы
+            status = parse_status_update(message)
+            if self._apply_status(status, [QUERY_POWER] if code == "UPW" else []):
+                # Плеер включился: громкость и источник запросит цикл опроса
+                self._request_resync()
+        elif self._state == MediaPlayerState.OFF:
+            return
+        elif code == "UPL":
+            if params in UPL_DISC_CHANGE:
+                self._invalidate_disc_info()
+            state = UPL_TO_STATE.get(params.rstrip("0123456789"), MediaPlayerState.IDLE)
+            if not self._accept("playback", state):
+                return
+            self._set_state(state)
+        elif code == "UTC":
+            time_code = parse_time_code(params)
+            changed = time_code is not None and self._update_media_info(
+                {"title": time_code.title, "chapter": time_code.chapter}
             )
-            writer.write(f"{command}\r".encode())
-            await asyncio.wait_for(writer.drain(), timeout=1)
-            if expect_response:
-                response = await asyncio.wait_for(reader.read(2048), timeout=2)
-                writer.close()
-                await writer.wait_closed()
-                return response.decode().strip()
-            writer.close()
-            await writer.wait_closed()
-            return True
-        except asyncio.TimeoutError:
-            _LOGGER.debug(f"Timeout sending command {command} to {self._host}")
+            if not self._handle_time_code(time_code) and not changed:
+                return
+        elif code == "UDT":
+            # Новый диск: кэш сведений о прежнем диске больше не действителен
+            self._invalidate_disc_info()
+            self._update_media_info(parse_media_update(message))
+        elif code in MEDIA_UPDATE_CODES:
+            if code == "UVO":
+                # Сменился выходной видеосигнал, а с ним мог смениться режим HDR
+                self._create_sync_task(self._async_sync_hdr())
+            if not self._update_media_info(parse_media_update(message)):
+                return
+        else:
+            return
+        self._write_state()
+
+    def _set_state(self, state):
+        """Set the player state and keep the playback position in sync with it."""
+        previous, self._state = self._state, state
+        if state == MediaPlayerState.OFF:
+            self._powered.clear()
+            self._invalidate_disc_info()
+        if state in PLAYBACK_STATES:
+            # HA интерполирует позицию сам, синхронизируемся только при смене состояния
+            if previous != state:
+                self._request_position_sync()
+        elif self._media_position is not None or self._media_duration is not None:
+            self._media_position = None
+            self._media_duration = None
+            self._media_position_updated_at = None
+            self._media_title_number = None
+
+    def _accept(self, key, value):
+        """Return True if a value reported by the player should replace ours."""
+        return self._optimistic.accept(key, value, asyncio.get_running_loop().time())
+
+    def _optimistic_snapshot(self):
+        """Return the fields an optimistic update may change."""
+        return self._state, self._is_muted, self._current_source
+
+    def _restore(self, snapshot):
+        """Roll back an optimistic update that the player rejected."""
+        state, self._is_muted, self._current_source = snapshot
+        if state != self._state:
+            self._set_state(state)
+        self._write_state()
+
+    async def _async_send_optimistic(
+        self, command, key, expected, show, timeout=CONFIRM_TIMEOUT, hold=0, rejected=None
+    ):
+        """Show the expected result of a command at once and reconcile it later.
+
+        ``show`` applies the expected result to the entity before the command
+        is sent. If the player rejects the command the change is rolled back
+        right away; otherwise the next status report confirms it, and once
+        the confirmation window (``hold`` plus ``timeout`` from now) is over
+        a targeted query settles it either way.
+        ``hold`` lets the command wait that long for an unreachable player.
+        ``rejected`` is called with the reply if the player answers ``ER``.
+        Returns the reply, or None if the command failed.
+        """
+        snapshot = self._optimistic_snapshot()
+        show()
+        self._write_state()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + hold + timeout
+        self._optimistic.expect(key, expected, deadline)
+        response = await self._send_command(command, expect_response=True, hold=hold)
+        if response and response.ok:
+            # Раньше срока ожидания ответ на проверочный запрос отбросился бы
+            # как устаревший, поэтому проверяем ровно по его истечении
+            self._schedule_verify(key, max(deadline - loop.time(), 0))
+            return response
+        _LOGGER.error(f"Command {command} failed ({response}), rolling back")
+        if response and rejected is not None:
+            rejected(response)
+        self._optimistic.discard(key)
+        self._restore(snapshot)
+        return None
+
+    def _schedule_verify(self, key, delay):
+        """Query the player for ``key`` once the confirmation window is over."""
+        handle = self._verify_handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        self._verify_handles[key] = asyncio.get_running_loop().call_later(
+            delay, self._verify, key
+        )
+
+    def _verify(self, key):
+        """Run the query that settles an unconfirmed optimistic update."""
+        self._verify_handles.pop(key, None)
+        if self._optimistic.is_pending(key):
+            self._scheduler.request(VERIFY_QUERIES[key])
+            self._hub.request_poll(self._hub_key)
+
+    def _invalidate_disc_info(self):
+        """Forget the cached disc metadata (eject, disc change or power event)."""
+        if self._media_info:
+            self._media_info = {}
+            self._media_info_version += 1
+        self._disc_info_loaded = False
+
+    def _update_media_info(self, fields):
+        """Merge media metadata; return True if anything changed."""
+        changed = {
+            field: value
+            for field, value in fields.items()
+            if self._media_info.get(field) != value
+        }
+        if not changed:
+            return False
+        self._media_info = {**self._media_info, **changed}
+        self._media_info_version += 1
+        return True
+
+    def _set_position(self, position):
+        """Store a position reported by the player."""
+        self._media_position = position
+        self._media_position_updated_at = dt_util.utcnow()
+
+    def _create_sync_task(self, coro):
+        """Run a background status sync that is cancelled with the entity."""
+        if self.hass is None:
+            coro.close()
+            return
+        task = self.hass.async_create_task(coro)
+        self._sync_tasks.add(task)
+        task.add_done_callback(self._sync_tasks.discard)
+
+    def _request_position_sync(self):
+        """Query the title position and length in the background."""
+        self._create_sync_task(self._async_sync_position())
+
+    async def _async_sync_hdr(self):
+        """Re-read the HDR mode, which the player does not push."""
+        status = parse_status([QUERY_HDR], await self._commands.async_send_many([QUERY_HDR]) or [])
+        if status.hdr_status is None or self._state == MediaPlayerState.OFF:
+            return
+        if self._update_media_info({"hdr_status": status.hdr_status}):
+            if self._events is not None:
+                self._events.fire("hdr_changed", hdr_status=status.hdr_status)
+            self._write_state()
+
+    async def _async_sync_position(self):
+        """Fetch the title elapsed and remaining time in one batch.
+
+        The first sync after a disc change also fetches the disc metadata;
+        afterwards it is kept up to date by status updates.
+        """
+        queries = [QUERY_TITLE_ELAPSED, QUERY_TITLE_REMAINING]
+        load_disc_info = not self._disc_info_loaded
+        if load_disc_info:
+            queries += MEDIA_INFO_QUERIES
+        status = parse_status(queries, await self._commands.async_send_many(queries) or [])
+        if self._state not in PLAYBACK_STATES:
+            return
+        if load_disc_info:
+            media_info = status.media_info()
+            self._disc_info_loaded = "disc_type" in media_info
+            self._update_media_info(media_info)
+        if status.elapsed is not None:
+            self._set_position(status.elapsed)
+            if status.remaining is not None:
+                self._media_duration = status.elapsed + status.remaining
+        self._write_state()
+
+    def _handle_time_code(self, time_code):
+        """Apply an @UTC time code; return True if the position was re-synced."""
+        if time_code is None or self._state != MediaPlayerState.PLAYING:
+            return False
+        if time_code.title != self._media_title_number:
+            # Новый титул: длительность нужно запросить заново
+            self._media_title_number = time_code.title
+            self._request_position_sync()
+            return False
+        if time_code.kind == "T":
+            position = time_code.seconds
+        elif time_code.kind == "X" and self._media_duration is not None:
+            position = self._media_duration - time_code.seconds
+        else:
             return False
-        except Exception as e:
-            _LOGGER.debug(f"Failed to send command {command}: {e}")
+        if self._media_position is not None and self._media_position_updated_at is not None:
+            expected = self._media_position + (
+                dt_util.utcnow() - self._media_position_updated_at
+            ).total_seconds()
+            if abs(position - expected) <= POSITION_DRIFT:
+                return False
+        self._set_position(position)
+        return True
+
+    def _state_snapshot(self):
+        """Return the values that make up the HA state of the entity."""
+        return (
+            self._state,
+            self._volume_oppo,
+            self._is_muted,
+            self._current_source,
+            # Список входов только сокращается, поэтому достаточно числа отклонённых
+            len(self._unsupported_sources),
+            self._media_position,
+            self._media_duration,
+            self._media_position_updated_at,
+            self._media_info_version,
+        )
+
+    def _write_state(self):
+        """Schedule a write of the HA state; changes made meanwhile are written together."""
+        if self._write_handle is None:
+            self._write_handle = asyncio.get_running_loop().call_later(
+                WRITE_DEBOUNCE, self._flush_state
+            )
+
+    def _flush_state(self):
+        """Write the HA state if it differs from what was written last."""
+        self._write_handle = None
+        snapshot = self._state_snapshot()
+        if snapshot == self._written_snapshot:
+            return
+        self._written_snapshot = snapshot
+        self.async_write_ha_state()
+        self._publish()
+
+    def _publish(self):
+        """Hand the written state to the companion entities of the device."""
+        published = OppoSnapshot(
+            state=self._state,
+            volume=self._volume_oppo,
+            muted=self._is_muted,
+            source=self._current_source,
+            sources=tuple(self.source_list),
+            media_info=MappingProxyType(self._media_info),
+        )
+        # Позиция воспроизведения сопутствующим сущностям не нужна
+        if published != self._published:
+            self._published = published
+            if self.hass is None:
+                # Сущность работает без HA (tools/benchmark.py): подписчиков нет
+                return
+            async_dispatcher_send(self.hass, SIGNAL_STATE.format(self._hub_key), published)
+
+    def _apply_status(self, status, queries):
+        """Apply a status snapshot; return True if the player has just turned on."""
+        turned_on = False
+        # Без ответа на #QPW (power is None) питание считается неизвестным, а не выключенным
+        if (
+            QUERY_POWER in queries
+            and status.power is not None
+            and self._accept("power", status.power)
+        ):
+            if status.power:
+                self._powered.set()
+                if self._state == MediaPlayerState.OFF or self._state_update_pending:
+                    self._set_state(MediaPlayerState.IDLE)
+                    self._state_update_pending = False
+                    turned_on = True
+            elif self._state != MediaPlayerState.OFF:
+                self._set_state(MediaPlayerState.OFF)
+                self._current_source = None
+                _LOGGER.debug(f"Oppo is off (power status: {status.power})")
+        if self._state == MediaPlayerState.OFF:
             return False
+        if status.muted is not None and self._accept("muted", status.muted):
+            self._is_muted = status.muted
+        if status.volume is not None:
+            self._volume_oppo = status.volume
+            self._volume = status.volume / 100.0
+        if status.source in QIS_TO_SOURCE:
+            source = QIS_TO_SOURCE[status.source]
+            if self._accept("source", source):
+                self._current_source = source
+        if status.playback in QPL_TO_STATE:
+            state = QPL_TO_STATE[status.playback]
+            if self._accept("playback", state):
+                self._set_state(state)
+        return turned_on
+
+    async def async_refresh(self, queries, priority=PRIORITY_POLL):
+        """Run a batch of status queries over the open session and write HA state once.
+
+        When the batch shows that the player has just turned on, the rest of
+        the status is fetched in a second batch before writing. Returns the
+        queries that were run.
+        """
+        queries = list(queries)
+        responses = await self._commands.async_send_many(queries, priority)
+        status = parse_status(queries, responses or [])
+        if responses is False:
+            # Плеер недоступен: для карточки это то же, что выключен
+            status = replace(status, power=False)
+        _LOGGER.debug(f"Status refresh {queries}: {status}")
+        if self._apply_status(status, queries):
+            extra = [query for query in FULL_REFRESH if query not in queries]
+            if extra:
+                responses = await self._commands.async_send_many(extra, priority)
+                self._apply_status(parse_status(extra, responses or []), extra)
+                queries += extra
+        self._write_state()
+        return queries
+
+    async def _send_command(self, command, expect_response=False, priority=PRIORITY_USER, hold=0):
+        """Send an IP Control Protocol command to the Oppo UDP-20x device."""
+        return await self._commands.async_send(command, expect_response, priority, hold)
 
     async def async_send_custom_command(self, command):
         """Send a custom IP Control Protocol command to the Oppo UDP-20x."""
         await self._send_command(command, expect_response=False)
         _LOGGER.debug(f"Custom command '{command}' sent")
 
+    def resolve_command(self, command):
+        """Turn a command name (with its value) or a bare protocol command into ``#XXX``.
+
+        Accepts ``up``, ``set_input 1``, ``NUP``, ``SVL 30`` or ``#SVL 30``.
+        """
+        command = command.strip()
+        name, _, value = command.partition(" ")
+        if name in COMMANDS_BY_NAME:
+            return build_command(name, value.strip() or None)
+        return command if command.startswith("#") else f"#{command}"
+
+    async def async_send_sequence(self, commands, delay=0, stop_on_error=True):
+        """Send a list of commands over the open session, one key at a time.
+
+        Each key is sent as soon as the player has acknowledged the previous
+        one, which paces the sequence to the rate the player accepts input;
+        ``delay`` (per sequence or per step) adds a pause after every key.
+        Returns the acknowledgements of every step.
+        """
+        steps = []
+        failed = False
+        for position, step in enumerate(commands):
+            if isinstance(step, str):
+                step = {"command": step}
+            command = self.resolve_command(step["command"])
+            repeat = step.get("repeat", 1)
+            step_delay = step.get("delay", delay)
+            result = {"command": command, "repeat": repeat, "acknowledged": 0, "response": None}
+            steps.append(result)
+            if failed:
+                continue
+            for index in range(repeat):
+                response = await self._send_command(command, expect_response=True)
+                if response:
+                    result["response"] = f"{response.result} {response.params}".strip()
+                if not response or not response.ok:
+                    # Нет ответа, связь потеряна или плеер отклонил команду
+                    failed = stop_on_error
+                    break
+                result["acknowledged"] += 1
+                last_key = index == repeat - 1 and position == len(commands) - 1
+                if step_delay and not last_key:
+                    await asyncio.sleep(step_delay)
+            if result["acknowledged"] < repeat:
+                _LOGGER.warning(
+                    f"Sequence step {command} acknowledged {result['acknowledged']}/{repeat}: "
+                    f"{result['response']}"
+                )
+        _LOGGER.debug(f"Sequence sent: {steps}")
+        return {"success": all(s["acknowledged"] == s["repeat"] for s in steps), "steps": steps}
+
+    def _current_position(self):
+        """Return the playback position now, advanced from the last report while playing."""
+        if self._media_position is None:
+            return None
+        position = self._media_position
+        if self._state == MediaPlayerState.PLAYING and self._media_position_updated_at is not None:
+            position += (dt_util.utcnow() - self._media_position_updated_at).total_seconds()
+        return int(position)
+
+    def _current_scene(self):
+        """Return the cached state of the player as a scene."""
+        if self._state == MediaPlayerState.OFF:
+            return OppoScene()
+        info = self._media_info
+        return OppoScene(
+            power=True,
+            source=SOURCE_TO_QIS.get(self._current_source),
+            volume=self._volume_oppo,
+            muted=self._is_muted,
+            playback=STATE_TO_QPL.get(self._state),
+            title=info.get("title"),
+            position=self._current_position() if self._state in PLAYBACK_STATES else None,
+            audio_track=info.get("audio_track"),
+            audio_track_count=info.get("audio_track_count"),
+            subtitle_track=info.get("subtitle_track"),
+            subtitle_track_count=info.get("subtitle_track_count"),
+        )
+
+    async def async_snapshot(self):
+        """Remember the current scene for a later restore and return it.
+
+        The title, position and tracks are read from the player in one batch
+        so that a restore resumes at the exact second.
+        """
+        scene = self._current_scene()
+        if scene.playback in ("PLAY", "PAUSE"):
+            queries = [QUERY_TITLE, QUERY_TITLE_ELAPSED, QUERY_AUDIO, QUERY_SUBTITLE]
+            status = parse_status(
+                queries, await self._commands.async_send_many(queries, PRIORITY_USER) or []
+            )
+            scene = replace(
+                scene,
+                title=status.title if status.title is not None else scene.title,
+                position=status.elapsed if status.elapsed is not None else scene.position,
+                audio_track=status.audio_track or scene.audio_track,
+                audio_track_count=status.audio_track_count or scene.audio_track_count,
+                subtitle_track=(
+                    status.subtitle_track if status.subtitle_track is not None
+                    else scene.subtitle_track
+                ),
+                subtitle_track_count=status.subtitle_track_count or scene.subtitle_track_count,
+            )
+        self._scene = scene
+        _LOGGER.debug(f"Scene snapshot: {scene}")
+        return scene.as_dict()
+
+    async def _async_wait_powered(self, timeout):
+        """Wait until the player reports that it is on (@UPW 1 or a #QPW ON reply)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self._powered.is_set():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._powered.wait(), min(remaining, POWER_WAIT_INTERVAL))
+            except asyncio.TimeoutError:
+                # @UPW мог потеряться: спрашиваем питание сами
+                await self.async_refresh([QUERY_POWER], PRIORITY_USER)
+        return True
+
+    async def async_restore(self):
+        """Bring back the last snapshot, sending only what differs from the current state.
+
+        Each command is sent once the player has acknowledged the previous
+        one, then the status is refreshed. A player that has to be turned on
+        first is given time to report power on and then gets its input and
+        volume back, but not the playback position.
+        """
+        scene = self._scene
+        if scene is None:
+            _LOGGER.warning("No scene snapshot to restore")
+            return {"success": False, "steps": []}
+        if not scene.power:
+            if self._state != MediaPlayerState.OFF:
+                await self.async_turn_off()
+            return {"success": self._state == MediaPlayerState.OFF, "steps": []}
+        if not self._powered.is_set():
+            await self.async_turn_on()
+            if not await self._async_wait_powered(POWER_CONFIRM_TIMEOUT):
+                _LOGGER.warning("Scene restore failed: the player did not turn on")
+                return {"success": False, "steps": []}
+            # После включения вход и громкость ещё не известны
+            await self.async_refresh(FULL_REFRESH, PRIORITY_USER)
+            scene = replace(scene, playback=None)
+        commands = plan_restore(scene, self._current_scene())
+        # Плеер может отбросить команду, если следующая придёт до её выполнения,
+        # поэтому шаги идут по одному, каждый после подтверждения предыдущего
+        result = await self.async_send_sequence(commands, stop_on_error=False)
+        await self.async_refresh(FULL_REFRESH, PRIORITY_USER)
+        if any(command.startswith("#SRH") for command in commands):
+            self._request_position_sync()
+        if not result["success"]:
+            _LOGGER.warning(f"Scene restore failed: {result['steps']}")
+        _LOGGER.debug(f"Scene restored with {commands}")
+        return {
+            "success": result["success"] and self._state != MediaPlayerState.OFF,
+            "steps": result["steps"],
+        }
+
     async def async_set_volume_level(self, volume):
         """Set volume level (0-1) for Oppo UDP-20x."""
         new_volume = int(volume * 100)
-        response = await self._send_command(f"#SVL {new_volume}", expect_response=True)
-        if response and "@OK" in response:
-            if abs(volume - self._volume) > 0.01:
-                self._volume = volume
+        command = build_command("set_volume", new_volume)
+        response = await self._send_command(command, expect_response=True)
+        if response and response.ok:
+            # При перетаскивании ползунка промежуточные #SVL объединяются в очереди,
+            # поэтому берём значение из ответа, а не из запроса
+            reply = parse_reply(command, response)
+            if reply.volume is not None:
+                new_volume = reply.volume
+            if new_volume != self._volume_oppo:
+                self._volume = new_volume / 100.0
                 self._volume_oppo = new_volume
                 _LOGGER.debug(f"Volume set to {self._volume} (Oppo: {self._volume_oppo})")
-                self.async_write_ha_state()
+                self._write_state()
 
     async def async_volume_up(self):
         """Increase volume for Oppo UDP-20x."""
-        response = await self._send_command("#VUP", expect_response=True)
-        if response and "@OK" in response:
-            try:
-                volume_parts = response.split()
-                if len(volume_parts) > 1 and volume_parts[1].isdigit():
-                    self._volume_oppo = int(volume_parts[1])
-                    self._volume = self._volume_oppo / 100.0
-                    _LOGGER.debug(f"Volume increased to {self._volume} (Oppo: {self._volume_oppo})")
-                    self.async_write_ha_state()
-                else:
-                    await self._update_volume()
-            except (ValueError, IndexError):
-                _LOGGER.warning(f"Failed to parse volume from response: {response}")
-                await self._update_volume()
+        command = build_command("volume_up")
+        response = await self._send_command(command, expect_response=True)
+        if response and response.ok:
+            reply = parse_reply(command, response)
+            if reply.volume is not None:
+                self._volume_oppo = reply.volume
+                self._volume = self._volume_oppo / 100.0
+                _LOGGER.debug(f"Volume increased to {self._volume} (Oppo: {self._volume_oppo})")
+                self._write_state()
+            else:
+                await self.async_refresh([QUERY_VOLUME], PRIORITY_USER)
         else:
             _LOGGER.error(f"Failed to increase volume: {response}")
 
     async def async_volume_down(self):
         """Decrease volume for Oppo UDP-20x."""
-        response = await self._send_command("#VDN", expect_response=True)
-        if response and "@OK" in response:
-            try:
-                volume_parts = response.split()
-                if len(volume_parts) > 1 and volume_parts[1].isdigit():
-                    self._volume_oppo = int(volume_parts[1])
-                    self._volume = self._volume_oppo / 100.0
-                    _LOGGER.debug(f"Volume decreased to {self._volume} (Oppo: {self._volume_oppo})")
-                    self.async_write_ha_state()
-                else:
-                    await self._update_volume()
-            except (ValueError, IndexError):
-                _LOGGER.warning(f"Failed to parse volume from response: {response}")
-                await self._update_volume()
+        command = build_command("volume_down")
+        response = await self._send_command(command, expect_response=True)
+        if response and response.ok:
+            reply = parse_reply(command, response)
+            if reply.volume is not None:
+                self._volume_oppo = reply.volume
+                self._volume = self._volume_oppo / 100.0
+                _LOGGER.debug(f"Volume decreased to {self._volume} (Oppo: {self._volume_oppo})")
+                self._write_state()
+            else:
+                await self.async_refresh([QUERY_VOLUME], PRIORITY_USER)
         else:
             _LOGGER.error(f"Failed to decrease volume: {response}")
 
     async def async_media_play(self):
         """Play media on Oppo UDP-20x."""
-        if await self._send_command("#PLA"):
-            self._state = MediaPlayerState.PLAYING
-            self.async_write_ha_state()
+        await self._async_send_optimistic(
+            build_command("play"), "playback", MediaPlayerState.PLAYING,
+            lambda: self._set_state(MediaPlayerState.PLAYING),
+        )
 
     async def async_media_stop(self):
         """Stop media on Oppo UDP-20x."""
-        if await self._send_command("#STP"):
-            self._state = MediaPlayerState.IDLE
-            self.async_write_ha_state()
+        await self._async_send_optimistic(
+            build_command("stop"), "playback", MediaPlayerState.IDLE,
+            lambda: self._set_state(MediaPlayerState.IDLE),
+        )
 
     async def async_media_pause(self):
         """Pause media on Oppo UDP-20x."""
-        if await self._send_command("#PAU"):
-            self._state = MediaPlayerState.PAUSED
-            self.async_write_ha_state()
+        await self._async_send_optimistic(
+            build_command("pause"), "playback", MediaPlayerState.PAUSED,
+            lambda: self._set_state(MediaPlayerState.PAUSED),
+        )
+
+    async def async_media_seek(self, position):
+        """Seek to a position of the current title on Oppo UDP-20x."""
+        position = int(position)
+        command = build_command(
+            "search", f"T {position // 3600}:{position // 60 % 60:02d}:{position % 60:02d}"
+        )
+        response = await self._send_command(command, expect_response=True)
+        if response and response.ok:
+            self._set_position(position)
+            self._write_state()
+        else:
+            _LOGGER.error(f"Failed to seek with {command}: {response}")
 
     async def async_media_next_track(self):
         """Skip to next track on Oppo UDP-20x."""
-        await self._send_command("#NXT")
+        await self._send_command(build_command("next"))
 
     async def async_media_previous_track(self):
         """Skip to previous track on Oppo UDP-20x."""
-        await self._send_command("#PRE")
+        await self._send_command(build_command("previous"))
 
     async def async_turn_on(self):
         """Turn on the Oppo UDP-20x."""
-        if await self._send_command("#PON"):
-            # Устанавливаем состояние включения сразу и добавляем задержку,
-            # чтобы дать устройству время стабилизироваться
-            self._state = MediaPlayerState.IDLE
+        def show():
+            if self._state == MediaPlayerState.OFF:
+                self._set_state(MediaPlayerState.IDLE)
+            # Громкость и источник дозапросятся, когда плеер подтвердит включение
+            self._state_update_pending = True
+
+        hold = 0
+        if not self._connection.connected:
+            # Плеер не в сети: часто переподключаемся и придерживаем #PON, пока он не появится
+            self._hub.wake(self._hub_key)
+            hold = WAKE_DURATION
+        if await self._async_send_optimistic(
+            build_command("power_on"), "power", True, show, POWER_CONFIRM_TIMEOUT, hold
+        ):
             self._last_power_command = "on"
-            _LOGGER.debug("Oppo turned on with #PON, waiting for device to settle")
-            await asyncio.sleep(2)  # Увеличили задержку до 2 секунд для стабильности
-            await self._update_volume()
-            source_status = await self._send_command("#QIS", expect_response=True)
-            if source_status and "@OK" in source_status:
-                try:
-                    source_parts = source_status.split()
-                    if len(source_parts) > 1 and source_parts[1] in self._qis_to_source:
-                        self._current_source = self._qis_to_source[source_parts[1]]
-                        _LOGGER.debug(f"Current source updated to {self._current_source}")
-                except (ValueError, IndexError):
-                    _LOGGER.warning(f"Failed to parse source from response: {source_status}")
-            self.async_write_ha_state()
+            _LOGGER.debug("Oppo turned on with #PON")
+            self._request_resync()
         else:
-            _LOGGER.error("Failed to turn on Oppo with #PON")
+            self._state_update_pending = False
 
     async def async_turn_off(self):
         """Turn off the Oppo UDP-20x."""
-        if await self._send_command("#POF"):
-            # Устанавливаем состояние выключения сразу и добавляем небольшую задержку,
-            # чтобы избежать ложных срабатываний опроса состояния
-            self._state = MediaPlayerState.OFF
+        def show():
+            self._set_state(MediaPlayerState.OFF)
             self._current_source = None
+
+        if await self._async_send_optimistic(
+            build_command("power_off"), "power", False, show, POWER_CONFIRM_TIMEOUT
+        ):
             self._last_power_command = "off"
-            _LOGGER.debug("Oppo turned off with #POF, waiting for device to settle")
-            await asyncio.sleep(2)  # Увеличили задержку для стабильности
-            self.async_write_ha_state()
-        else:
-            _LOGGER.error("Failed to turn off Oppo with #POF")
+            _LOGGER.debug("Oppo turned off with #POF")
 
     async def async_mute_volume(self, mute):
         """Mute or unmute the Oppo UDP-20x volume."""
-        if await self._send_command("#MUT"):
+        def show():
             self._is_muted = mute
-            _LOGGER.debug(f"Mute set to {mute}")
-            self.async_write_ha_state()
+
+        command = build_command("mute")
+        response = await self._async_send_optimistic(command, "muted", mute, show)
+        if parse_reply(command, response).muted == (not mute):
+            # #MUT переключает звук: если плеер был в другом состоянии, переключаем ещё раз
+            response = await self._send_command(command, expect_response=True)
+        muted = parse_reply(command, response).muted
+        if muted is not None:
+            # Ответ на #MUT сообщает фактическое состояние звука
+            self._optimistic.discard("muted")
+            if muted != self._is_muted:
+                self._is_muted = muted
+                self._write_state()
+            _LOGGER.debug(f"Mute set to {self._is_muted}")
 
     async def async_select_source(self, source):
         """Select source on Oppo UDP-20x."""
-        if source in self._source_to_command:
-            command = self._source_to_command[source]
-            if await self._send_command(command):
-                _LOGGER.debug(f"Source switched to {source} with {command}")
-                self._current_source = source
-                self.async_write_ha_state()
-            else:
-                _LOGGER.error(f"Failed to send {command} for source {source}")
-        else:
-            _LOGGER.error(f"Unknown source: {source}")
-
-    async def async_press_up(self):
-        """Press Up button on Oppo UDP-20x."""
-        await self._send_command("#NUP")
-
-    async def async_press_down(self):
-        """Press Down button on Oppo UDP-20x."""
-        await self._send_command("#NDN")
+        if source in SOURCE_TO_QIS:
+            command = build_command("set_input", SOURCE_TO_QIS[source])
 
-    async def async_press_left(self):
-        """Press Left button on Oppo UDP-20x."""
-        await self._send_command("#NLT")
-
-    async def async_press_right(self):
-        """Press Right button on Oppo UDP-20x."""
-        await self._send_command("#NRT")
-
-    async def async_press_enter(self):
-        """Press Enter button on Oppo UDP-20x."""
-        await self._send_command("#SEL")
+            def show():
+                self._current_source = source
 
-    async def async_press_home(self):
-        """Press Home button on Oppo UDP-20x."""
-        await self._send_command("#HOM")
+            def rejected(response):
+                # @SIS ER OFF и прочие отказы временные; скрываем только вход,
+                # которого нет у этой модели
+                if SOURCE_TO_QIS[source] not in MODEL_DEPENDENT_INPUTS:
+                    return
+                if not response.params.strip().upper().startswith("INVALID"):
+                    return
+                _LOGGER.warning(f"Input {source} is not supported by the player, hiding it")
+                self._unsupported_sources.add(source)
 
-    async def _update_volume(self):
-        """Update the current volume level and mute status from Oppo UDP-20x."""
-        volume_status = await self._send_command("#QVL", expect_response=True)
-        _LOGGER.debug(f"Volume status response: {volume_status}")
-        if volume_status and ("@OK" in volume_status):
-            try:
-                volume_parts = volume_status.split()
-                if len(volume_parts) > 1:
-                    if volume_parts[1] == "MUTE":
-                        self._is_muted = True
-                        _LOGGER.debug("Mute status updated to True")
-                    elif volume_parts[1].isdigit():
-                        self._is_muted = False
-                        self._volume_oppo = int(volume_parts[1])
-                        self._volume = self._volume_oppo / 100.0
-                        _LOGGER.debug(f"Volume updated to {self._volume} (Oppo: {self._volume_oppo})")
-                    self.async_write_ha_state()
-            except (ValueError, IndexError):
-                _LOGGER.warning(f"Failed to parse volume/mute status: {volume_status}")
+            if await self._async_send_optimistic(command, "source", source, show, rejected=rejected):
+                _LOGGER.debug(f"Source switched to {source} with {command}")
         else:
-            _LOGGER.debug("No valid volume response, skipping update")
+            _LOGGER.error(f"Unknown source: {source}")
 
-    async def async_poll_status(self):
-        """Poll the Oppo UDP-20x status periodically."""
-        while self._running:
+    async def async_poll(self):
+        """Run the status queries that are due; return seconds until the next poll."""
+        loop = asyncio.get_running_loop()
+        if self._connection.breaker_open:
+            # Плеер недоступен: вместо запросов его проверяют переподключения хаба,
+            # после подключения опрос запустится заново
+            if self._state != MediaPlayerState.OFF and self._accept("power", False):
+                self._set_state(MediaPlayerState.OFF)
+                self._current_source = None
+                self._write_state()
+            self._scheduler.reschedule([QUERY_POWER], loop.time(), False, False, False)
+            return self._scheduler.next_delay(loop.time(), False)
+        # Хаб запускает опрос с опережением до WAKE_WINDOW, такие запросы уже считаются due
+        due = self._scheduler.due_queries(
+            loop.time() + WAKE_WINDOW, self._state != MediaPlayerState.OFF
+        )
+        if due:
             try:
-                # Проверяем состояние питания устройства
-                power_status = await self._send_command("#QPW", expect_response=True)
-                _LOGGER.debug(f"Power status response: {power_status}")
-
-                if power_status:
-                    if "ON" in power_status.upper():
-                        if self._state == MediaPlayerState.OFF or self._state_update_pending:
-                            self._state = MediaPlayerState.IDLE
-                            self._state_update_pending = False
-                            await self._update_volume()
-                            source_status = await self._send_command("#QIS", expect_response=True)
-                            if source_status and "@OK" in source_status:
-                                try:
-                                    source_parts = source_status.split()
-                                    if len(source_parts) > 1 and source_parts[1] in self._qis_to_source:
-                                        self._current_source = self._qis_to_source[source_parts[1]]
-                                        _LOGGER.debug(f"Current source updated to {self._current_source}")
-                                except (ValueError, IndexError):
-                                    _LOGGER.warning(f"Failed to parse source from response: {source_status}")
-                            self.async_write_ha_state()
-                    elif "OFF" in power_status.upper():
-                        # Если устройство выключено, не меняем состояние, если оно уже OFF
-                        if self._state != MediaPlayerState.OFF:
-                            self._state = MediaPlayerState.OFF
-                            self._current_source = None  # Сбрасываем источник при выключении
-                            _LOGGER.debug("Oppo confirmed as OFF")
-                            self.async_write_ha_state()
-                else:
-                    # Если нет ответа, считаем, что устройство выключено
-                    if self._state != MediaPlayerState.OFF:
-                        self._state = MediaPlayerState.OFF
-                        self._current_source = None
-                        _LOGGER.debug("No response from #QPW, assuming Oppo is off")
-                        self.async_write_ha_state()
-
-                if self._state != MediaPlayerState.OFF:
-                    await self._update_volume()
-                    play_status = await self._send_command("#QPL", expect_response=True)
-                    _LOGGER.debug(f"Play status response: {play_status}")
-                    if play_status and "@OK" in play_status:
-                        status = play_status.split()[-1].lower()
-                        if "play" in status and self._state != MediaPlayerState.PLAYING:
-                            self._state = MediaPlayerState.PLAYING
-                            self.async_write_ha_state()
-                        elif "pause" in status and self._state != MediaPlayerState.PAUSED:
-                            self._state = MediaPlayerState.PAUSED
-                            self.async_write_ha_state()
-                        elif "stop" in status and self._state != MediaPlayerState.IDLE:
-                            self._state = MediaPlayerState.IDLE
-                            self.async_write_ha_state()
-
+                due = await self.async_refresh(due)
             except Exception as e:
                 _LOGGER.error(f"Error polling status: {e}")
+                self._connection.stats.count(COUNTER_POLL_ERRORS, repr(e))
                 if self._state != MediaPlayerState.OFF:
-                    self._state = MediaPlayerState.OFF
+                    self._set_state(MediaPlayerState.OFF)
                     self._current_source = None
                     _LOGGER.debug("Exception caught, assuming Oppo is off")
-                    self.async_write_ha_state()
+                    self._write_state()
 
-            await asyncio.sleep(2)
+        powered = self._state != MediaPlayerState.OFF
+        self._scheduler.reschedule(
+            due,
+            loop.time(),
+            powered,
+            self._state in (MediaPlayerState.PLAYING, MediaPlayerState.PAUSED),
+            self._connection.connected,
+        )
+        return self._scheduler.next_delay(loop.time(), powered)
 
     async def async_will_remove_from_hass(self):
         """Clean up when Oppo UDP-20x entity is removed."""
-        self._running = False
+        # Соединение закрывает хаб при выгрузке записи
+        self._hub.unregister_poll(self._hub_key)
+        if self.hass is not None:
+            self.hass.data[DOMAIN].get(DATA_PLAYERS, {}).pop(self._hub_key, None)
+        if self._write_handle is not None:
+            self._write_handle.cancel()
+            self._write_handle = None
+        for task in list(self._sync_tasks):
+            task.cancel()
+        for handle in self._verify_handles.values():
+            handle.cancel()
+        self._verify_handles.clear()
@@ -0,0 +1,43 @@
+"""Optimistic state tracking for Oppo UDP-20x commands.
+
+A command's expected result is shown right away and remembered together
+with a deadline. Until the deadline, status that contradicts the expected
+value is treated as stale (the player is still switching) and ignored;
+status that matches confirms it. After the deadline the player's status
+wins, which rolls a silently failed command back.
+"""
+
+# Окно подтверждения (секунды) для транспортных команд, звука и входа
+CONFIRM_TIMEOUT = 5
+# Включение из режима ожидания занимает заметно больше времени
+POWER_CONFIRM_TIMEOUT = 20
+
+
+class OppoOptimisticState:
+    """Expected values of state fields that the player has not confirmed yet."""
+
+    def __init__(self):
+        self._pending = {}
+
+    def expect(self, key, value, deadline):
+        """Remember that ``key`` should become ``value`` by ``deadline``."""
+        self._pending[key] = (value, deadline)
+
+    def discard(self, key):
+        """Forget the expected value of ``key`` (e.g. the command failed)."""
+        self._pending.pop(key, None)
+
+    def is_pending(self, key):
+        """Return True if ``key`` still waits for confirmation."""
+        return key in self._pending
+
+    def accept(self, key, value, now):
+        """Return True if a value reported by the player should be applied."""
+        pending = self._pending.get(key)
+        if pending is None:
+            return True
+        expected, deadline = pending
+        if value == expected or now >= deadline:
+            del self._pending[key]
+            return True
+        return False
@@ -0,0 +1,94 @@
+"""Adaptive status polling for an Oppo UDP-20x player.
+
+Every status query has its own due time, recomputed from the player state
+after it runs: power is probed rarely (with exponential backoff) while the
+player is off or unreachable, playback status is polled quickly only during
+playback, and volume is refreshed at a low rate or right after a volume
+command. The input source is checked in the same batches so that a switch
+made with the IR remote is seen even if its push update was missed. While
+the push channel is up the player reports changes itself, so the remaining
+queries only act as a health check.
+"""
+from .const import (
+    CONF_OFF_INTERVAL,
+    CONF_PLAY_INTERVAL,
+    CONF_VOLUME_INTERVAL,
+    DEFAULT_OFF_INTERVAL,
+    DEFAULT_PLAY_INTERVAL,
+    DEFAULT_VOLUME_INTERVAL,
+)
+from .protocol import QUERY_PLAYBACK, QUERY_POWER, QUERY_SOURCE, QUERY_VOLUME
+
+IDLE_INTERVAL = 10
+HEALTH_CHECK_INTERVAL = 30
+OFF_MAX_INTERVAL = 300
+
+
+class OppoPollScheduler:
+    """Track when each status query is due next."""
+
+    def __init__(
+        self,
+        off_interval=DEFAULT_OFF_INTERVAL,
+        play_interval=DEFAULT_PLAY_INTERVAL,
+        volume_interval=DEFAULT_VOLUME_INTERVAL,
+    ):
+        self.off_interval = off_interval
+        self.play_interval = play_interval
+        self.volume_interval = volume_interval
+        self._due = {
+            QUERY_POWER: 0.0,
+            QUERY_PLAYBACK: 0.0,
+            QUERY_VOLUME: 0.0,
+            QUERY_SOURCE: 0.0,
+        }
+        self._off_probes = 0
+
+    @classmethod
+    def from_options(cls, options):
+        """Create a scheduler from config entry options."""
+        return cls(
+            options.get(CONF_OFF_INTERVAL, DEFAULT_OFF_INTERVAL),
+            options.get(CONF_PLAY_INTERVAL, DEFAULT_PLAY_INTERVAL),
+            options.get(CONF_VOLUME_INTERVAL, DEFAULT_VOLUME_INTERVAL),
+        )
+
+    def due_queries(self, now, powered):
+        """Return the queries that should run now."""
+        if not powered:
+            # Пока плеер выключен, опрашиваем только питание
+            return [QUERY_POWER] if self._due[QUERY_POWER] <= now else []
+        return [query for query, due in self._due.items() if due <= now]
+
+    def request(self, query):
+        """Make a query due immediately (e.g. after a volume command)."""
+        self._due[query] = 0.0
+
+    def reschedule(self, queries, now, powered, playing, push_active):
+        """Compute the next due time of the queries that just ran."""
+        for query in queries:
+            self._due[query] = now + self._interval(query, powered, playing, push_active)
+        if powered:
+            self._off_probes = 0
+
+    def _interval(self, query, powered, playing, push_active):
+        """Return the interval of one query in the given player state."""
+        if query == QUERY_POWER:
+            if not powered:
+                interval = self.off_interval * 2 ** self._off_probes
+                self._off_probes += 1
+                return min(interval, max(self.off_interval, OFF_MAX_INTERVAL))
+            return HEALTH_CHECK_INTERVAL if push_active else IDLE_INTERVAL
+        if query == QUERY_VOLUME:
+            return self.volume_interval
+        if query == QUERY_SOURCE:
+            # Вход переключают редко, поэтому без ускорения во время воспроизведения
+            return HEALTH_CHECK_INTERVAL if push_active else IDLE_INTERVAL
+        if push_active:
+            return HEALTH_CHECK_INTERVAL
+        return self.play_interval if playing else IDLE_INTERVAL
+
+    def next_delay(self, now, powered):
+        """Return the number of seconds until the next query is due."""
+        due = self._due[QUERY_POWER] if not powered else min(self._due.values())
+        return max(due - now, 0.0)
@@ -0,0 +1,577 @@
+"""Oppo UDP-20x IP Control Protocol command table and message parsing.
+
+Responses have the form ``@<code> OK|ER [params]`` once the verbose mode is
+1 or above (``@OK|ER [params]`` in verbose mode 0). In verbose mode 2 and 3
+the player also sends unsolicited status updates such as ``@UPL PLAY``.
+
+``COMMANDS`` lists every command of the protocol together with the parser
+of its reply; it is built once at import and shared by all players.
+``OppoLineParser`` frames the byte stream from the player into messages.
+"""
+from dataclasses import dataclass
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+RESULT_OK = "OK"
+RESULT_ERROR = "ER"
+
+QUERY_POWER = "#QPW"
+QUERY_VOLUME = "#QVL"
+QUERY_SOURCE = "#QIS"
+QUERY_PLAYBACK = "#QPL"
+QUERY_TITLE_ELAPSED = "#QTE"
+QUERY_TITLE_REMAINING = "#QTR"
+QUERY_FIRMWARE = "#QVR"
+QUERY_HDR = "#QHS"
+QUERY_TITLE = "#QTK"
+QUERY_AUDIO = "#QAT"
+QUERY_SUBTITLE = "#QST"
+
+# Запросы сведений о диске и текущем контенте
+MEDIA_INFO_QUERIES = (
+    "#QDT",
+    QUERY_TITLE,
+    "#QCH",
+    QUERY_AUDIO,
+    QUERY_SUBTITLE,
+    "#QHD",
+    QUERY_HDR,
+    "#QAR",
+)
+
+
+class OppoMessage(NamedTuple):
+    """A single line received from the player."""
+
+    code: Optional[str]
+    result: str
+    params: str
+
+    @property
+    def ok(self):
+        """Return True if the player accepted the command."""
+        return self.result == RESULT_OK
+
+    @property
+    def is_update(self):
+        """Return True for an unsolicited status update (``@U..``)."""
+        return not self.result
+
+
+def command_code(command):
+    """Return the 3-character code of a command such as ``#SVL 50``."""
+    return command.lstrip("#")[:3].upper()
+
+
+def parse_line(line):
+    """Parse one ``\\r``-terminated line; return None if it is not a message."""
+    line = line.strip()
+    if not line.startswith("@"):
+        return None
+    parts = line[1:].split(" ", 2)
+    if parts[0] in (RESULT_OK, RESULT_ERROR):
+        # Verbose mode 0: код команды в ответе не передаётся
+        return OppoMessage(None, parts[0], " ".join(parts[1:]))
+    if len(parts) > 1 and parts[1] in (RESULT_OK, RESULT_ERROR):
+        return OppoMessage(parts[0], parts[1], parts[2] if len(parts) > 2 else "")
+    return OppoMessage(parts[0], "", " ".join(parts[1:]))
+
+
+# Строка без \r длиннее этого — мусор в потоке, а не недочитанный ответ
+MAX_LINE_LENGTH = 1024
+
+
+class OppoLineParser:
+    """Incremental ``\r`` framing of the byte stream from a player.
+
+    ``feed`` accepts whatever a socket read returned: several messages in
+    one chunk, a message split across chunks, or both. Each complete line
+    is decoded and parsed exactly once; an incomplete trailing line is kept
+    for the next chunk.
+    """
+
+    def __init__(self, max_line=MAX_LINE_LENGTH):
+        self._buffer = b""
+        self._max_line = max_line
+
+    def feed(self, data) -> Tuple[List[OppoMessage], List[str]]:
+        """Return the messages completed by ``data`` and the lines that are not messages."""
+        lines = (self._buffer + data if self._buffer else data).split(b"\r")
+        self._buffer = lines.pop()
+        rejected = []
+        if len(self._buffer) > self._max_line:
+            rejected.append(self._buffer[:40].decode(errors="replace") + "...")
+            self._buffer = b""
+        messages = []
+        for raw in lines:
+            text = raw.decode(errors="replace")
+            message = parse_line(text)
+            if message is not None:
+                messages.append(message)
+            elif text.strip():
+                rejected.append(text.strip())
+        return messages, rejected
+
+
+@dataclass(frozen=True)
+class OppoStatus:
+    """Snapshot of the player status built from a batch of query replies.
+
+    Fields are None when the corresponding query was not part of the batch
+    or got no valid reply.
+    """
+
+    power: Optional[bool] = None
+    volume: Optional[int] = None
+    muted: Optional[bool] = None
+    source: Optional[str] = None
+    playback: Optional[str] = None
+    elapsed: Optional[int] = None
+    remaining: Optional[int] = None
+    disc_type: Optional[str] = None
+    title: Optional[int] = None
+    title_count: Optional[int] = None
+    chapter: Optional[int] = None
+    chapter_count: Optional[int] = None
+    audio_type: Optional[str] = None
+    audio_track: Optional[int] = None
+    audio_track_count: Optional[int] = None
+    audio_language: Optional[str] = None
+    subtitle_track: Optional[int] = None
+    subtitle_track_count: Optional[int] = None
+    subtitle_language: Optional[str] = None
+    hdr_status: Optional[str] = None
+    video_resolution: Optional[str] = None
+    aspect_ratio: Optional[str] = None
+    firmware: Optional[str] = None
+
+    def media_info(self):
+        """Return the media metadata fields that are set."""
+        return {
+            field: getattr(self, field)
+            for field in MEDIA_INFO_FIELDS
+            if getattr(self, field) is not None
+        }
+
+
+MEDIA_INFO_FIELDS = (
+    "disc_type",
+    "title",
+    "title_count",
+    "chapter",
+    "chapter_count",
+    "audio_type",
+    "audio_track",
+    "audio_track_count",
+    "audio_language",
+    "subtitle_track",
+    "subtitle_track_count",
+    "subtitle_language",
+    "hdr_status",
+    "video_resolution",
+    "aspect_ratio",
+)
+
+# Коды @UDT и названия типов дисков из ответов #QDT
+UDT_TO_DISC_TYPE = {
+    "UHBD": "UHBD",
+    "BDMV": "BD-MV",
+    "DVDV": "DVD-VIDEO",
+    "DVDA": "DVD-AUDIO",
+    "SACD": "SACD",
+    "CDDA": "CDDA",
+    "DATA": "DATA-DISC",
+    "VCD2": "VCD",
+    "SVCD": "SVCD",
+    "UNKW": "UNKNOW-DISC",
+}
+
+# Коды формата звука в @UAT
+UAT_TO_AUDIO_TYPE = {
+    "DD": "DD",
+    "DP": "DD+",
+    "DT": "TrueHD",
+    "TS": "DTS",
+    "TH": "DTS-HD HR",
+    "TM": "DTS-HD MA",
+    "PC": "LPCM",
+    "MP": "MPEG",
+    "CD": "CD",
+    "UN": "Unknown",
+}
+
+
+def parse_time(value):
+    """Convert ``HH:MM:SS`` to seconds; return None if it is not a time."""
+    parts = value.strip().split(":")
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    hours, minutes, seconds = (int(part) for part in parts)
+    return hours * 3600 + minutes * 60 + seconds
+
+
+class OppoTimeCode(NamedTuple):
+    """Playback time reported by an ``@UTC`` update."""
+
+    title: int
+    chapter: int
+    kind: str
+    seconds: int
+
+
+def parse_time_code(params):
+    """Parse ``@UTC`` parameters such as ``001 003 T 00:01:23``."""
+    parts = params.split()
+    if len(parts) != 4 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    seconds = parse_time(parts[3])
+    if seconds is None:
+        return None
+    return OppoTimeCode(int(parts[0]), int(parts[1]), parts[2], seconds)
+
+
+def _parse_power(params):
+    # Ответ на #QPW: "ON" или "OFF"; обновление @UPW: "1" или "0"
+    return {"power": params.upper() in ("ON", "1")}
+
+
+def _parse_volume(params):
+    # Ответ на #QVL и команды громкости: "35" или "MUTE"; обновление @UVL: "035" или "MUT"
+    value = params.split(" ", 1)[0].upper()
+    if value in ("MUTE", "MUT"):
+        return {"muted": True}
+    if value.isdigit():
+        return {"muted": False, "volume": int(value)}
+    return {}
+
+
+def _parse_mute(params):
+    # #MUT переключает звук и сообщает результат: "MUTE" или "UNMUTE"
+    value = params.upper()
+    return {"muted": value == "MUTE"} if value in ("MUTE", "UNMUTE") else {}
+
+
+def _parse_source(params):
+    # "0 BD-PLAYER" (и @UIS "1 HDMI-IN"): номер входа, затем его название
+    source = params.split(" ", 1)[0]
+    return {"source": source} if source.isdigit() else {}
+
+
+def _parse_playback(params):
+    return {"playback": params.upper()} if params else {}
+
+
+def _parse_elapsed(params):
+    seconds = parse_time(params)
+    return {"elapsed": seconds} if seconds is not None else {}
+
+
+def _parse_remaining(params):
+    seconds = parse_time(params)
+    return {"remaining": seconds} if seconds is not None else {}
+
+
+def _parse_counter(value):
+    """Parse ``current/total`` such as ``02/10``."""
+    current, _, total = value.partition("/")
+    if not current.isdigit() or not total.isdigit():
+        return None
+    return int(current), int(total)
+
+
+def _parse_disc_type(params):
+    return {"disc_type": params} if params else {}
+
+
+def _parse_title(params):
+    counter = _parse_counter(params)
+    return {"title": counter[0], "title_count": counter[1]} if counter else {}
+
+
+def _parse_chapter(params):
+    counter = _parse_counter(params)
+    return {"chapter": counter[0], "chapter_count": counter[1]} if counter else {}
+
+
+def _parse_audio(params):
+    # "DTS 2/5 English", "DD 1/1" или просто "LPCM"
+    parts = params.split(" ", 2)
+    if not parts[0]:
+        return {}
+    fields = {"audio_type": parts[0]}
+    counter = _parse_counter(parts[1]) if len(parts) > 1 else None
+    if counter:
+        fields["audio_track"], fields["audio_track_count"] = counter
+    if len(parts) > 2:
+        fields["audio_language"] = parts[2]
+    return fields
+
+
+def _parse_subtitle(params):
+    # "OFF" или "1/1 English"
+    if params.upper() == "OFF":
+        return {"subtitle_track": 0}
+    track, _, language = params.partition(" ")
+    counter = _parse_counter(track)
+    if not counter:
+        return {}
+    fields = {"subtitle_track": counter[0], "subtitle_track_count": counter[1]}
+    if language:
+        fields["subtitle_language"] = language
+    return fields
+
+
+def _parse_hdr_status(params):
+    return {"hdr_status": params} if params else {}
+
+
+def _parse_resolution(params):
+    return {"video_resolution": params} if params else {}
+
+
+def _parse_aspect_ratio(params):
+    return {"aspect_ratio": params.split(" ", 1)[0]} if params else {}
+
+
+def _parse_firmware(params):
+    return {"firmware": params} if params else {}
+
+
+# Виды команд: клавиша пульта, установка значения, запрос состояния
+KIND_KEY = "key"
+KIND_SET = "set"
+KIND_QUERY = "query"
+
+
+class OppoCommand(NamedTuple):
+    """One command of the IP Control Protocol."""
+
+    code: str
+    name: str
+    label: str
+    kind: str = KIND_KEY
+    # Разбор ответа в поля OppoStatus
+    parser: Optional[Callable[[str], dict]] = None
+    # Описание параметра команды установки
+    parameter: Optional[str] = None
+
+    def format(self, value=None):
+        """Return the command line, e.g. ``#SVL 50``."""
+        return f"#{self.code}" if value is None else f"#{self.code} {value}"
+
+
+def _key(code, name, label, parser=None):
+    return OppoCommand(code, name, label, KIND_KEY, parser)
+
+
+def _set(code, name, label, parameter, parser=None):
+    return OppoCommand(code, name, label, KIND_SET, parser, parameter)
+
+
+def _query(code, name, label, parser=None):
+    return OppoCommand(code, name, label, KIND_QUERY, parser)
+
+
+COMMANDS = {
+    command.code: command
+    for command in (
+        # Клавиши пульта
+        _key("POW", "power", "Power toggle", _parse_power),
+        _key("PON", "power_on", "Power on", _parse_power),
+        _key("POF", "power_off", "Power off", _parse_power),
+        _key("SRC", "input", "Input"),
+        _key("EJT", "eject", "Eject / Load"),
+        _key("DIM", "dimmer", "Dimmer"),
+        _key("PUR", "pure_audio", "Pure audio"),
+        _key("VUP", "volume_up", "Volume up", _parse_volume),
+        _key("VDN", "volume_down", "Volume down", _parse_volume),
+        _key("MUT", "mute", "Mute", _parse_mute),
+        _key("NU1", "number_1", "1"),
+        _key("NU2", "number_2", "2"),
+        _key("NU3", "number_3", "3"),
+        _key("NU4", "number_4", "4"),
+        _key("NU5", "number_5", "5"),
+        _key("NU6", "number_6", "6"),
+        _key("NU7", "number_7", "7"),
+        _key("NU8", "number_8", "8"),
+        _key("NU9", "number_9", "9"),
+        _key("NU0", "number_0", "0"),
+        _key("CLR", "clear", "Clear"),
+        _key("GOT", "goto", "Go to"),
+        _key("HOM", "home", "Home Screen"),
+        _key("PUP", "page_up", "Page up"),
+        _key("PDN", "page_down", "Page down"),
+        _key("OSD", "info", "Info / Display"),
+        _key("TTL", "top_menu", "Top menu"),
+        _key("MNU", "popup_menu", "Pop-up menu"),
+        _key("NUP", "up", "Up"),
+        _key("NDN", "down", "Down"),
+        _key("NLT", "left", "Left"),
+        _key("NRT", "right", "Right"),
+        _key("SEL", "enter", "Confirm"),
+        _key("SET", "setup", "Setup menu"),
+        _key("RET", "return", "Return"),
+        _key("RED", "red", "Red"),
+        _key("GRN", "green", "Green"),
+        _key("BLU", "blue", "Blue"),
+        _key("YLW", "yellow", "Yellow"),
+        _key("STP", "stop", "Stop"),
+        _key("PLA", "play", "Play"),
+        _key("PAU", "pause", "Pause"),
+        _key("PRE", "previous", "Previous"),
+        _key("REV", "reverse", "Fast reverse"),
+        _key("FWD", "forward", "Fast forward"),
+        _key("NXT", "next", "Next"),
+        _key("AUD", "audio", "Audio"),
+        _key("SUB", "subtitle", "Subtitle"),
+        _key("ANG", "angle", "Angle"),
+        _key("ZOM", "zoom", "Zoom"),
+        _key("SAP", "secondary_audio", "Secondary audio"),
+        _key("ATB", "ab_replay", "A-B replay"),
+        _key("RPT", "repeat", "Repeat"),
+        _key("PIP", "picture_in_picture", "Picture in picture"),
+        _key("HDM", "resolution", "Output resolution"),
+        _key("SUH", "subtitle_hold", "Subtitle (hold)"),
+        _key("OPT", "option", "Option"),
+        _key("M3D", "3d", "3D"),
+        _key("SEH", "picture_adjustment", "Picture adjustment"),
+        _key("HDR", "hdr", "HDR mode"),
+        _key("INH", "info_hold", "Info (hold)"),
+        _key("RLH", "resolution_hold", "Resolution (hold)"),
+        _key("AVS", "av_sync", "A/V sync"),
+        _key("GPA", "gapless", "Gapless play"),
+        _key("NOP", "no_operation", "No operation"),
+        # Команды установки
+        _set("SVM", "set_verbose_mode", "Set verbose mode", "0-3"),
+        _set("SVL", "set_volume", "Set volume", "0-100 or MUTE", _parse_volume),
+        _set("SIS", "set_input", "Set input", "0-5", _parse_source),
+        _set("SRP", "set_repeat", "Set repeat mode", "ALL, TT, CH, OFF, SHF or RND"),
+        _set("SZM", "set_zoom", "Set zoom", "1, AR, FS, US, 1.2, 1.3, 1.5, 2, 1/2, 3, 4 or 1/3"),
+        _set("SRH", "search", "Go to time", "T H:MM:SS, C H:MM:SS or track number"),
+        _set("STC", "set_time_display", "Set time display", "E, R, T, X, C or K"),
+        _set("SSH", "set_subtitle_shift", "Set subtitle shift", "-10 to 10"),
+        _set("SOD", "set_osd_position", "Set OSD position", "0-5"),
+        _set("APP", "start_app", "Start app", "DIS, MUS, PHO, MOV, NET or SET"),
+        # Запросы
+        _query("QPW", "query_power", "Power status", _parse_power),
+        _query("QVR", "query_firmware", "Firmware version", _parse_firmware),
+        _query("QVM", "query_verbose_mode", "Verbose mode"),
+        _query("QVL", "query_volume", "Volume", _parse_volume),
+        _query("QHD", "query_resolution", "Output resolution", _parse_resolution),
+        _query("QPL", "query_playback", "Playback status", _parse_playback),
+        _query("QTK", "query_title", "Title", _parse_title),
+        _query("QCH", "query_chapter", "Chapter", _parse_chapter),
+        _query("QTE", "query_title_elapsed", "Title elapsed time", _parse_elapsed),
+        _query("QTR", "query_title_remaining", "Title remaining time", _parse_remaining),
+        _query("QCE", "query_chapter_elapsed", "Chapter elapsed time"),
+        _query("QCR", "query_chapter_remaining", "Chapter remaining time"),
+        _query("QEL", "query_track_elapsed", "Track elapsed time"),
+        _query("QRE", "query_track_remaining", "Track remaining time"),
+        _query("QDT", "query_disc_type", "Disc type", _parse_disc_type),
+        _query("QAT", "query_audio", "Audio type", _parse_audio),
+        _query("QST", "query_subtitle", "Subtitle", _parse_subtitle),
+        _query("QSH", "query_subtitle_shift", "Subtitle shift"),
+        _query("QOP", "query_osd_position", "OSD position"),
+        _query("QRP", "query_repeat", "Repeat mode"),
+        _query("QZM", "query_zoom", "Zoom mode"),
+        _query("QIS", "query_input", "Input source", _parse_source),
+        _query("QAR", "query_aspect_ratio", "Aspect ratio", _parse_aspect_ratio),
+        _query("QHS", "query_hdr", "HDR status", _parse_hdr_status),
+    )
+}
+COMMANDS_BY_NAME = {command.name: command for command in COMMANDS.values()}
+# Клавиши пульта, доступные в send_command по имени
+PRESET_COMMANDS = {
+    command.name: command.format()
+    for command in COMMANDS.values()
+    if command.kind == KIND_KEY
+}
+
+
+def build_command(name, value=None):
+    """Return the command line for a command name, e.g. ``build_command("set_volume", 50)``."""
+    return COMMANDS_BY_NAME[name].format(value)
+
+
+def parse_status(commands, responses):
+    """Build an OppoStatus from the replies to a batch of commands."""
+    fields = {}
+    for command, response in zip(commands, responses):
+        if not response or not response.ok:
+            continue
+        entry = COMMANDS.get(command_code(command))
+        if entry is not None and entry.parser is not None:
+            fields.update(entry.parser(response.params.strip()))
+    return OppoStatus(**fields)
+
+
+def parse_reply(command, response):
+    """Return the OppoStatus fields carried by the reply to a single command."""
+    return parse_status([command], [response])
+
+
+# Обновления, которые разбираются теми же парсерами, что и ответы на запросы
+_STATUS_UPDATE_PARSERS = {
+    "UPW": _parse_power,
+    "UVL": _parse_volume,
+    "UIS": _parse_source,
+}
+STATUS_UPDATE_CODES = frozenset(_STATUS_UPDATE_PARSERS)
+
+
+def parse_status_update(message):
+    """Build an OppoStatus from a power, volume or input status update."""
+    parser = _STATUS_UPDATE_PARSERS.get(message.code)
+    return OppoStatus(**parser(message.params.strip())) if parser is not None else OppoStatus()
+
+
+def _parse_disc_type_update(params):
+    disc_type = UDT_TO_DISC_TYPE.get(params)
+    return {"disc_type": disc_type} if disc_type else {}
+
+
+def _parse_audio_update(params):
+    # "DD 01/05 ENG 5.1"
+    parts = params.split()
+    if not parts:
+        return {}
+    fields = {"audio_type": UAT_TO_AUDIO_TYPE.get(parts[0], parts[0])}
+    counter = _parse_counter(parts[1]) if len(parts) > 1 else None
+    if counter:
+        fields["audio_track"], fields["audio_track_count"] = counter
+    if len(parts) > 2:
+        fields["audio_language"] = parts[2]
+    return fields
+
+
+def _parse_subtitle_update(params):
+    # "02/05 ENG", "00/xx" при выключенных субтитрах
+    track, _, language = params.partition(" ")
+    counter = _parse_counter(track)
+    if not counter:
+        return {}
+    fields = {"subtitle_track": counter[0], "subtitle_track_count": counter[1]}
+    if language:
+        fields["subtitle_language"] = language
+    return fields
+
+
+def _parse_video_update(params):
+    # "_480I60 1080P60": разрешение источника и выхода
+    parts = params.split()
+    return {"video_resolution": parts[-1].strip("_")} if parts else {}
+
+
+_UPDATE_PARSERS = {
+    "UDT": _parse_disc_type_update,
+    "UAT": _parse_audio_update,
+    "UST": _parse_subtitle_update,
+    "UVO": _parse_video_update,
+    "UAR": _parse_aspect_ratio,
+}
+MEDIA_UPDATE_CODES = frozenset(_UPDATE_PARSERS)
+
+
+def parse_media_update(message):
+    """Return the media metadata fields carried by a status update."""
+    parser = _UPDATE_PARSERS.get(message.code)
+    return parser(message.params.strip()) if parser is not None else {}
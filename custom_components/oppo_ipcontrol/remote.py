@@ -0,0 +1,89 @@
+"""Remote of the Oppo UDP-20x IP Control Protocol integration.
+
+Sends remote keys by preset name (``up``, ``enter``, ``audio`` ...) or as
+protocol commands over the player's persistent connection. Repeated and
+held keys are streamed back to back: each key goes out as soon as the
+player has acknowledged the previous one, which keeps up with how fast
+the player accepts input.
+"""
+import asyncio
+import logging
+
+from homeassistant.components.remote import (
+    ATTR_DELAY_SECS,
+    ATTR_HOLD_SECS,
+    ATTR_NUM_REPEATS,
+    DEFAULT_DELAY_SECS,
+    DEFAULT_HOLD_SECS,
+    DEFAULT_NUM_REPEATS,
+    RemoteEntity,
+)
+
+from .entity import OppoEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the Oppo UDP-20x remote from a config entry."""
+    async_add_entities([OppoRemote(config_entry)])
+
+
+class OppoRemote(OppoEntity, RemoteEntity):
+    """The remote control of an Oppo UDP-20x player."""
+
+    _attr_name = None
+
+    def __init__(self, config_entry):
+        super().__init__(config_entry, "remote")
+
+    @property
+    def available(self):
+        # Пульт нужен и для включения, поэтому доступен и при выключенном плеере
+        return self.player is not None
+
+    @property
+    def is_on(self):
+        return self._snapshot.powered
+
+    async def async_turn_on(self, **kwargs):
+        """Turn the player on."""
+        await self.player.async_turn_on()
+
+    async def async_turn_off(self, **kwargs):
+        """Turn the player off."""
+        await self.player.async_turn_off()
+
+    async def async_send_command(self, command, **kwargs):
+        """Send keys, optionally repeated and held.
+
+        The whole list is sent ``num_repeats`` times with ``delay_secs``
+        between keys. A key with ``hold_secs`` is resent back to back for
+        that long, like the auto-repeat of a held button on the IR remote.
+        """
+        num_repeats = kwargs.get(ATTR_NUM_REPEATS, DEFAULT_NUM_REPEATS)
+        delay = kwargs.get(ATTR_DELAY_SECS, DEFAULT_DELAY_SECS)
+        hold = kwargs.get(ATTR_HOLD_SECS, DEFAULT_HOLD_SECS)
+        keys = list(command)
+        player = self.player
+        if not hold:
+            result = await player.async_send_sequence(keys * num_repeats, delay=delay)
+            if not result["success"]:
+                _LOGGER.warning(f"Remote keys {keys} were not all acknowledged")
+            return
+        loop = asyncio.get_running_loop()
+        for repeat in range(num_repeats):
+            for position, key in enumerate(keys):
+                deadline = loop.time() + hold
+                sent = 0
+                # Плеер не различает нажатие и отпускание: удержание — это поток нажатий
+                while not sent or loop.time() < deadline:
+                    result = await player.async_send_sequence([key])
+                    if not result["success"]:
+                        _LOGGER.warning(f"Remote key {key} not acknowledged after {sent} presses")
+                        return
+                    sent += 1
+                _LOGGER.debug(f"Remote key {key} held for {hold}s ({sent} presses)")
+                last_key = repeat == num_repeats - 1 and position == len(keys) - 1
+                if delay and not last_key:
+                    await asyncio.sleep(delay)
@@ -0,0 +1,110 @@
+"""Scene snapshots of an Oppo UDP-20x player.
+
+A scene records power, input, volume and mute and, while a title is
+playing or paused, the playback state, the position in the title and the
+audio and subtitle tracks. Restoring a scene compares it with the current
+state and returns only the commands that differ, in the order they have to
+be sent.
+"""
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from .protocol import build_command
+
+# Состояния #QPL, в которых у плеера есть позиция в титуле
+PLAYBACK_ACTIVE = ("PLAY", "PAUSE")
+# Расхождение позиции (секунды), которое не стоит перемотки
+SEEK_TOLERANCE = 2
+
+
+@dataclass(frozen=True)
+class OppoScene:
+    """The restorable state of a player.
+
+    ``playback`` holds a #QPL value (``PLAY``, ``PAUSE`` or ``STOP``);
+    fields are None when the state was unknown or did not apply.
+    """
+
+    power: bool = False
+    source: Optional[str] = None
+    volume: Optional[int] = None
+    muted: Optional[bool] = None
+    playback: Optional[str] = None
+    title: Optional[int] = None
+    position: Optional[int] = None
+    audio_track: Optional[int] = None
+    audio_track_count: Optional[int] = None
+    subtitle_track: Optional[int] = None
+    subtitle_track_count: Optional[int] = None
+
+    def as_dict(self):
+        """Return the scene for a service response."""
+        return {field: value for field, value in asdict(self).items() if value is not None}
+
+
+def _format_position(position):
+    return f"T {position // 3600}:{position // 60 % 60:02d}:{position % 60:02d}"
+
+
+def _cycle(target, current, count):
+    """Return how many presses of a cycling key move from ``current`` to ``target``."""
+    if None in (target, current, count) or count <= 0:
+        return 0
+    return (target - current) % count
+
+
+def _plan_playback(scene, current):
+    """Return the commands that bring back the title position and tracks."""
+    commands = []
+    if current.playback not in PLAYBACK_ACTIVE:
+        # С остановки #PLA продолжает воспроизведение с места остановки
+        commands.append(build_command("play"))
+    same_title = scene.title is None or current.title in (None, scene.title)
+    if (
+        scene.position is not None
+        and same_title
+        and (current.position is None or abs(current.position - scene.position) > SEEK_TOLERANCE)
+    ):
+        commands.append(build_command("search", _format_position(scene.position)))
+    if same_title:
+        # Дорожки переключаются только по кругу клавишами AUDIO и SUBTITLE;
+        # у субтитров в круг входит положение «выключены» (дорожка 0)
+        commands += [build_command("audio")] * _cycle(
+            scene.audio_track, current.audio_track, current.audio_track_count
+        )
+        subtitle_count = current.subtitle_track_count
+        commands += [build_command("subtitle")] * _cycle(
+            scene.subtitle_track,
+            current.subtitle_track,
+            subtitle_count + 1 if subtitle_count is not None else None,
+        )
+    if scene.playback == "PAUSE":
+        commands.append(build_command("pause"))
+    elif current.playback == "PAUSE":
+        commands.append(build_command("play"))
+    return commands
+
+
+def plan_restore(scene, current):
+    """Return the commands that turn the ``current`` state into ``scene``.
+
+    Only the differences are returned. Power is not part of the plan: a
+    player that is off has to be woken up before anything else is sent.
+    """
+    if not scene.power or not current.power:
+        return []
+    commands = []
+    if scene.source is not None and scene.source != current.source:
+        commands.append(build_command("set_input", scene.source))
+    if scene.volume is not None and (
+        scene.volume != current.volume or (current.muted and scene.muted is False)
+    ):
+        # #SVL с уровнем громкости заодно снимает приглушение
+        commands.append(build_command("set_volume", scene.volume))
+    if scene.muted and (not current.muted or commands and commands[-1].startswith("#SVL")):
+        commands.append(build_command("set_volume", "MUTE"))
+    if scene.playback in PLAYBACK_ACTIVE:
+        commands += _plan_playback(scene, current)
+    elif scene.playback == "STOP" and current.playback in PLAYBACK_ACTIVE:
+        commands.append(build_command("stop"))
+    return commands
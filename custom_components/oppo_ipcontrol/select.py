@@ -0,0 +1,91 @@
+"""Selects of the Oppo UDP-20x IP Control Protocol integration.
+
+The input source and the audio track of the current disc, shown from the
+state snapshot of the media player entity and changed through it, so that
+its optimistic updates and command queue apply to them as well.
+"""
+import logging
+
+from homeassistant.components.select import SelectEntity
+
+from .entity import OppoEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the Oppo UDP-20x selects from a config entry."""
+    async_add_entities([
+        OppoSourceSelect(config_entry),
+        OppoAudioTrackSelect(config_entry),
+    ])
+
+
+class OppoSourceSelect(OppoEntity, SelectEntity):
+    """The input source of an Oppo UDP-20x player."""
+
+    _attr_name = "Source"
+    _attr_icon = "mdi:video-input-hdmi"
+
+    def __init__(self, config_entry):
+        super().__init__(config_entry, "source")
+
+    def _value(self, snapshot):
+        return snapshot.source, snapshot.sources
+
+    @property
+    def options(self):
+        return list(self._snapshot.sources)
+
+    @property
+    def current_option(self):
+        return self._snapshot.source
+
+    async def async_select_option(self, option):
+        """Switch the player to another input."""
+        player = self.player
+        if player is None:
+            _LOGGER.error(f"Cannot select source {option}: the media player is not set up")
+            return
+        await player.async_select_source(option)
+
+
+class OppoAudioTrackSelect(OppoEntity, SelectEntity):
+    """The audio track of the disc in an Oppo UDP-20x player."""
+
+    _attr_name = "Audio track"
+    _attr_icon = "mdi:translate"
+
+    def __init__(self, config_entry):
+        super().__init__(config_entry, "audio_track")
+
+    def _value(self, snapshot):
+        info = snapshot.media_info
+        return info.get("audio_track"), info.get("audio_track_count")
+
+    @property
+    def available(self):
+        return super().available and bool(self._snapshot.media_info.get("audio_track_count"))
+
+    @property
+    def options(self):
+        count = self._snapshot.media_info.get("audio_track_count") or 0
+        return [str(track) for track in range(1, count + 1)]
+
+    @property
+    def current_option(self):
+        track = self._snapshot.media_info.get("audio_track")
+        return str(track) if track else None
+
+    async def async_select_option(self, option):
+        """Press the Audio key until the player reaches the selected track."""
+        # Протокол не позволяет выбрать дорожку по номеру: клавиша Audio перебирает их по кругу
+        info = self._snapshot.media_info
+        current, count = info.get("audio_track"), info.get("audio_track_count")
+        player = self.player
+        if player is None or not current or not count:
+            _LOGGER.error(f"Cannot select audio track {option}: the current track is unknown")
+            return
+        presses = (int(option) - current) % count
+        if presses:
+            await player.async_send_sequence([{"command": "audio", "repeat": presses}])
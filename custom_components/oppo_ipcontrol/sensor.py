@@ -0,0 +1,163 @@
+"""Sensors of the Oppo UDP-20x IP Control Protocol integration.
+
+State sensors show the volume, audio format and HDR mode from the state
+snapshot of the media player entity. Diagnostic sensors expose the
+transport statistics of each player (command latency, poll duration and
+failure counters) so that a degrading network path or an overloaded
+player shows up in the history before it becomes a problem.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Optional
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+
+from . import entry_unique_id
+from .const import DATA_HUB, DOMAIN
+from .entity import OppoEntity, OppoSnapshot, device_info
+from .stats import (
+    COUNTER_CONNECT_FAILURES,
+    COUNTER_DISCONNECTS,
+    COUNTER_PARSE_FAILURES,
+    COUNTER_POLL_ERRORS,
+    COUNTER_RECONNECTS,
+    COUNTER_TIMEOUTS,
+    OppoStats,
+)
+
+# Статистика только читается из памяти, поэтому опрос раз в минуту ничего не стоит
+SCAN_INTERVAL = timedelta(seconds=60)
+
+
+def _milliseconds(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+@dataclass(frozen=True, kw_only=True)
+class OppoSensorEntityDescription(SensorEntityDescription):
+    """Describes an Oppo diagnostic sensor."""
+
+    value_fn: Callable[[OppoStats], Optional[float]]
+
+
+@dataclass(frozen=True, kw_only=True)
+class OppoStateSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor that shows part of the player state."""
+
+    value_fn: Callable[[OppoSnapshot], Any]
+
+
+STATE_SENSORS = (
+    OppoStateSensorEntityDescription(
+        key="volume",
+        name="Volume",
+        icon="mdi:volume-high",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda snapshot: snapshot.volume,
+    ),
+    OppoStateSensorEntityDescription(
+        key="audio_format",
+        name="Audio format",
+        icon="mdi:surround-sound",
+        value_fn=lambda snapshot: snapshot.media_info.get("audio_type"),
+    ),
+    OppoStateSensorEntityDescription(
+        key="hdr_mode",
+        name="HDR mode",
+        icon="mdi:hdr",
+        value_fn=lambda snapshot: snapshot.media_info.get("hdr_status"),
+    ),
+)
+
+
+def _latency_sensor(key, name, percent):
+    return OppoSensorEntityDescription(
+        key=key,
+        name=name,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _milliseconds(stats.latency(percent)),
+    )
+
+
+def _counter_sensor(key, name, enabled=True):
+    return OppoSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=enabled,
+        value_fn=lambda stats: stats.counters[key],
+    )
+
+
+SENSORS = (
+    _latency_sensor("command_latency", "Command latency", 50),
+    _latency_sensor("command_latency_p95", "Command latency (95th percentile)", 95),
+    OppoSensorEntityDescription(
+        key="poll_duration",
+        name="Poll duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _milliseconds(stats.poll_duration()),
+    ),
+    _counter_sensor(COUNTER_TIMEOUTS, "Command timeouts"),
+    _counter_sensor(COUNTER_CONNECT_FAILURES, "Connection failures"),
+    _counter_sensor(COUNTER_RECONNECTS, "Reconnects"),
+    _counter_sensor(COUNTER_DISCONNECTS, "Disconnects", enabled=False),
+    _counter_sensor(COUNTER_PARSE_FAILURES, "Parse failures", enabled=False),
+    _counter_sensor(COUNTER_POLL_ERRORS, "Poll errors", enabled=False),
+)
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the Oppo UDP-20x state and diagnostic sensors from a config entry."""
+    hub = hass.data[DOMAIN][DATA_HUB]
+    async_add_entities(
+        [OppoStateSensor(config_entry, description) for description in STATE_SENSORS]
+        + [OppoDiagnosticSensor(hub, config_entry, description) for description in SENSORS]
+    )
+
+
+class OppoStateSensor(OppoEntity, SensorEntity):
+    """A value from the state snapshot of an Oppo UDP-20x player."""
+
+    entity_description: OppoStateSensorEntityDescription
+
+    def __init__(self, config_entry, description):
+        super().__init__(config_entry, description.key)
+        self.entity_description = description
+
+    def _value(self, snapshot):
+        return self.entity_description.value_fn(snapshot)
+
+    @property
+    def native_value(self):
+        return self._value(self._snapshot)
+
+
+class OppoDiagnosticSensor(SensorEntity):
+    """A transport statistic of an Oppo UDP-20x player."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    entity_description: OppoSensorEntityDescription
+
+    def __init__(self, hub, config_entry, description):
+        self.entity_description = description
+        self._hub = hub
+        self._hub_key = config_entry.entry_id
+        self._attr_unique_id = f"{entry_unique_id(config_entry)}_{description.key}"
+        self._attr_device_info = device_info(config_entry)
+
+    async def async_update(self):
+        """Read the statistic from the player's connection."""
+        # Плеер регистрирует в хабе медиаплеер, платформы могут подняться в любом порядке
+        stats = self._hub.stats(self._hub_key)
+        self._attr_native_value = (
+            self.entity_description.value_fn(stats) if stats is not None else None
+        )
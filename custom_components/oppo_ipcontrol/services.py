@@ -0,0 +1,131 @@
+"""Domain services of the Oppo UDP-20x IP Control Protocol integration.
+
+``send_command`` and ``send_group_command`` address any number of players
+at once. The command is sent to all of them concurrently, each over its own
+open connection and with its own timeout, so a whole room of players is
+switched in about one round trip and one unreachable player cannot hold
+up the others.
+"""
+import asyncio
+import logging
+
+import voluptuous as vol
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import SupportsResponse
+from homeassistant.helpers import config_validation as cv
+
+from .const import DATA_PLAYERS, DOMAIN
+from .protocol import PRESET_COMMANDS
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SEND_COMMAND = "send_command"
+SERVICE_SEND_GROUP_COMMAND = "send_group_command"
+
+# Время (секунды), которое каждый плеер группы ждёт ответа на команду
+GROUP_COMMAND_TIMEOUT = 3
+
+SEND_COMMAND_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Optional("preset_command"): str,
+    vol.Optional("custom_command"): str,
+})
+SEND_GROUP_COMMAND_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Required("command"): cv.string,
+    vol.Optional("timeout", default=GROUP_COMMAND_TIMEOUT): vol.All(
+        vol.Coerce(float), vol.Range(min=0.1, max=30)
+    ),
+})
+
+
+def _target_players(hass, entity_ids):
+    """Return the media players a service call addresses (all of them by default)."""
+    players = list(hass.data.get(DOMAIN, {}).get(DATA_PLAYERS, {}).values())
+    if not entity_ids:
+        return players
+    targeted = [player for player in players if player.entity_id in entity_ids]
+    unknown = set(entity_ids) - {player.entity_id for player in targeted}
+    if unknown:
+        _LOGGER.warning("Not Oppo UDP-20x players: %s", ", ".join(sorted(unknown)))
+    return targeted
+
+
+async def _async_send_to_player(player, command, timeout):
+    """Send a command to one player and describe the outcome."""
+    try:
+        # По таймауту команда, ещё ждущая в очереди плеера, снимается и не уйдёт позже
+        result = await asyncio.wait_for(player.async_send_sequence([command]), timeout)
+    except asyncio.TimeoutError:
+        return {
+            "success": False,
+            "command": player.resolve_command(command),
+            "response": None,
+            "error": "timeout",
+        }
+    step = result["steps"][0]
+    outcome = {"success": result["success"], "command": step["command"], "response": step["response"]}
+    if not result["success"]:
+        outcome["error"] = "rejected" if step["response"] else "no response"
+    return outcome
+
+
+async def async_send_to_players(players, command, timeout=GROUP_COMMAND_TIMEOUT):
+    """Send a command to several players at once; return the results by entity ID."""
+    results = await asyncio.gather(
+        *(_async_send_to_player(player, command, timeout) for player in players)
+    )
+    return dict(zip((player.entity_id for player in players), results))
+
+
+def async_setup_services(hass):
+    """Register the domain services."""
+
+    async def handle_send_command(call):
+        """Handle the send_command service for Oppo UDP-20x."""
+        preset_command = call.data.get("preset_command")
+        custom_command = call.data.get("custom_command")
+
+        # Определяем, какая команда используется
+        if preset_command and preset_command in PRESET_COMMANDS:
+            command_to_send = PRESET_COMMANDS[preset_command]
+            _LOGGER.debug("Using preset command: %s -> %s", preset_command, command_to_send)
+        elif custom_command:
+            # Проверяем, что кастомная команда не пустая
+            if not custom_command.strip():
+                _LOGGER.warning("Custom command is empty")
+                return
+            command_to_send = custom_command.strip()
+            _LOGGER.debug("Using custom command: %s", command_to_send)
+        else:
+            _LOGGER.warning("No preset or custom command provided for send_command service")
+            return
+
+        await asyncio.gather(
+            *(
+                player.async_send_custom_command(player.resolve_command(command_to_send))
+                for player in _target_players(hass, call.data.get(ATTR_ENTITY_ID))
+            )
+        )
+
+    async def handle_send_group_command(call):
+        """Send one command to a group of players concurrently."""
+        players = _target_players(hass, call.data.get(ATTR_ENTITY_ID))
+        results = await async_send_to_players(players, call.data["command"], call.data["timeout"])
+        failed = [entity_id for entity_id, result in results.items() if not result["success"]]
+        if failed:
+            _LOGGER.warning(
+                "Group command %s failed on %s", call.data["command"], ", ".join(failed)
+            )
+        return {"success": bool(results) and not failed, "players": results}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SEND_COMMAND, handle_send_command, schema=SEND_COMMAND_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_GROUP_COMMAND,
+        handle_send_group_command,
+        schema=SEND_GROUP_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,101 @@
+"""Transport statistics of an Oppo UDP-20x player.
+
+The connection and the hub record command latencies, poll durations and
+failure counts here. Samples are kept in bounded ring buffers so the
+overhead stays constant however long Home Assistant runs; the diagnostic
+sensors and the diagnostics download read them.
+"""
+from collections import deque
+from datetime import datetime, timezone
+import statistics
+
+# Число последних замеров в каждом кольцевом буфере
+STATS_WINDOW = 200
+# Число последних событий (ошибок и переподключений) для диагностики
+EVENT_WINDOW = 50
+
+COUNTER_TIMEOUTS = "timeouts"
+COUNTER_CONNECT_FAILURES = "connect_failures"
+COUNTER_DISCONNECTS = "disconnects"
+COUNTER_RECONNECTS = "reconnects"
+COUNTER_PARSE_FAILURES = "parse_failures"
+COUNTER_POLL_ERRORS = "poll_errors"
+COUNTERS = (
+    COUNTER_TIMEOUTS,
+    COUNTER_CONNECT_FAILURES,
+    COUNTER_DISCONNECTS,
+    COUNTER_RECONNECTS,
+    COUNTER_PARSE_FAILURES,
+    COUNTER_POLL_ERRORS,
+)
+
+
+def _percentile(samples, percent):
+    """Return the given percentile of the samples, or None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class OppoStats:
+    """Ring buffers of latencies and counters of transport failures."""
+
+    def __init__(self, window=STATS_WINDOW):
+        self._window = window
+        self._latency = {}
+        self._poll_durations = deque(maxlen=window)
+        self._events = deque(maxlen=EVENT_WINDOW)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def record_latency(self, code, seconds):
+        """Record the round trip of one command."""
+        samples = self._latency.get(code)
+        if samples is None:
+            samples = self._latency[code] = deque(maxlen=self._window)
+        samples.append(seconds)
+
+    def record_poll(self, seconds):
+        """Record the duration of one poll cycle."""
+        self._poll_durations.append(seconds)
+
+    def count(self, counter, detail=None):
+        """Increment a failure counter and remember the event."""
+        self.counters[counter] += 1
+        self._events.append(
+            (datetime.now(timezone.utc).isoformat(), counter, detail)
+        )
+
+    def latency(self, percent, code=None):
+        """Return a latency percentile in seconds over one or all commands."""
+        if code is not None:
+            return _percentile(self._latency.get(code, ()), percent)
+        return _percentile(
+            [sample for samples in self._latency.values() for sample in samples],
+            percent,
+        )
+
+    def poll_duration(self):
+        """Return the mean duration of the recent poll cycles in seconds."""
+        return statistics.fmean(self._poll_durations) if self._poll_durations else None
+
+    def as_dict(self):
+        """Return everything recorded, for the diagnostics download."""
+        return {
+            "counters": dict(self.counters),
+            "latency_ms": {
+                code: {
+                    "samples": len(samples),
+                    "p50": round(_percentile(samples, 50) * 1000, 1),
+                    "p95": round(_percentile(samples, 95) * 1000, 1),
+                    "max": round(max(samples) * 1000, 1),
+                }
+                for code, samples in sorted(self._latency.items())
+                if samples
+            },
+            "poll_duration_ms": [round(sample * 1000, 1) for sample in self._poll_durations],
+            "events": [
+                {"time": time, "event": event, "detail": detail}
+                for time, event, detail in self._events
+            ],
+        }
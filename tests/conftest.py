@@ -0,0 +1,24 @@
+"""Make the HA-free modules of the integration importable in tests.
+
+Only the transport and protocol modules are tested here; they do not
+import Home Assistant, so the package ``__init__.py`` is bypassed the same
+way tools/benchmark.py does it.
+"""
+import pathlib
+import sys
+import types
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
+COMPONENT_DIR = REPO_ROOT / "custom_components" / "oppo_ipcontrol"
+PACKAGE = "custom_components.oppo_ipcontrol"
+
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+try:
+    import homeassistant  # noqa: F401  pylint: disable=unused-import
+except ImportError:
+    # Без Home Assistant подгружаем модули пакета напрямую, минуя __init__.py
+    _package = types.ModuleType(PACKAGE)
+    _package.__path__ = [str(COMPONENT_DIR)]
+    sys.modules[PACKAGE] = _package
@@ -0,0 +1,135 @@
+"""Tests of the prioritized command queue."""
+import asyncio
+
+from custom_components.oppo_ipcontrol.command_queue import (
+    PRIORITY_POLL,
+    PRIORITY_USER,
+    OppoCommandQueue,
+)
+
+
+class FakeConnection:
+    """Records what the queue sends; ``gate`` holds every command in flight."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def async_send(self, command, expect_response=False):
+        self.sent.append(command)
+        await self.gate.wait()
+        return f"reply {command}"
+
+    async def async_send_many(self, commands):
+        self.sent.append(list(commands))
+        await self.gate.wait()
+        return [f"reply {command}" for command in commands]
+
+    async def async_wait_connected(self, timeout):
+        return True
+
+
+async def _busy_queue():
+    """Return a queue whose worker is stuck sending #QPW until the gate opens."""
+    connection = FakeConnection()
+    connection.gate.clear()
+    queue = OppoCommandQueue(connection)
+    busy = asyncio.ensure_future(queue.async_send("#QPW", True, PRIORITY_POLL))
+    await asyncio.sleep(0)
+    return connection, queue, busy
+
+
+def test_volume_commands_are_coalesced():
+    async def run():
+        connection, queue, busy = await _busy_queue()
+        sends = [
+            asyncio.ensure_future(queue.async_send(f"#SVL {volume}", True))
+            for volume in (10, 20, 30)
+        ]
+        await asyncio.sleep(0)
+        connection.gate.set()
+        results = await asyncio.gather(busy, *sends)
+        await queue.async_close()
+        return connection.sent, results
+
+    sent, results = asyncio.run(run())
+    assert sent == ["#QPW", "#SVL 30"]
+    # Все вызовы получают ответ на последнее значение
+    assert results[1:] == ["reply #SVL 30"] * 3
+
+
+def test_user_commands_go_before_polls():
+    async def run():
+        connection, queue, busy = await _busy_queue()
+        poll = asyncio.ensure_future(queue.async_send("#QVL", True, PRIORITY_POLL))
+        user = asyncio.ensure_future(queue.async_send("#PLA", True, PRIORITY_USER))
+        await asyncio.sleep(0)
+        connection.gate.set()
+        await asyncio.gather(busy, poll, user)
+        await queue.async_close()
+        return connection.sent
+
+    assert asyncio.run(run()) == ["#QPW", "#PLA", "#QVL"]
+
+
+def test_repeated_navigation_keys_are_sent_as_one_batch():
+    async def run():
+        connection, queue, busy = await _busy_queue()
+        presses = [asyncio.ensure_future(queue.async_send("#NDN", True)) for _ in range(3)]
+        await asyncio.sleep(0)
+        poll = asyncio.ensure_future(queue.async_send("#QVL", True, PRIORITY_USER))
+        await asyncio.sleep(0)
+        connection.gate.set()
+        results = await asyncio.gather(busy, *presses, poll)
+        await queue.async_close()
+        return connection.sent, results
+
+    sent, results = asyncio.run(run())
+    # Каждое нажатие отправляется отдельно, но без вклинивания других команд
+    assert sent == ["#QPW", "#NDN", "#NDN", "#NDN", "#QVL"]
+    assert results[1:4] == ["reply #NDN"] * 3
+
+
+def test_batch_of_queries():
+    async def run():
+        connection = FakeConnection()
+        queue = OppoCommandQueue(connection)
+        replies = await queue.async_send_many(["#QPW", "#QVL"])
+        empty = await queue.async_send_many([])
+        await queue.async_close()
+        return connection.sent, replies, empty
+
+    sent, replies, empty = asyncio.run(run())
+    assert sent == [["#QPW", "#QVL"]]
+    assert replies == ["reply #QPW", "reply #QVL"]
+    assert empty == []
+
+
+def test_command_without_waiters_is_dropped():
+    async def run():
+        connection, queue, busy = await _busy_queue()
+        try:
+            await asyncio.wait_for(queue.async_send("#POF", True), 0.01)
+        except asyncio.TimeoutError:
+            pass
+        connection.gate.set()
+        await busy
+        await queue.async_send("#QVL", True)
+        await queue.async_close()
+        return connection.sent
+
+    assert asyncio.run(run()) == ["#QPW", "#QVL"]
+
+
+def test_close_fails_queued_commands():
+    async def run():
+        _connection, queue, busy = await _busy_queue()
+        queued = asyncio.ensure_future(queue.async_send("#QVL", True))
+        await asyncio.sleep(0)
+        await queue.async_close()
+        return await asyncio.gather(busy, queued), await queue.async_send("#QVL", True)
+
+    results, after_close = asyncio.run(run())
+    assert results == [False, False]
+    assert after_close is False
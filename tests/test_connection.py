@@ -0,0 +1,117 @@
+"""Tests of the player connection against the protocol simulator."""
+import asyncio
+
+from oppo_simulator import OppoSimulator
+
+from custom_components.oppo_ipcontrol.connection import OppoConnection, async_probe
+
+
+def test_batch_is_sent_one_command_at_a_time():
+    chunks = []
+
+    async def handle(reader, writer):
+        # Отвечает на каждую строку и запоминает, что пришло за одно чтение
+        while data := await reader.read(1024):
+            chunks.append(data)
+            for line in data.split(b"\r"):
+                if line:
+                    writer.write(b"@" + line[1:4] + b" OK\r")
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        connection = OppoConnection("127.0.0.1", port)
+        replies = await connection.async_send_many(["#QPW", "#QVL", "#QIS"])
+        await connection.async_close()
+        server.close()
+        return replies
+
+    replies = asyncio.run(run())
+    assert [reply.code for reply in replies] == ["QPW", "QVL", "QIS"]
+    # Следующая команда уходит только после ответа на предыдущую
+    assert chunks == [b"#SVM 3\r", b"#QPW\r", b"#QVL\r", b"#QIS\r"]
+
+
+def test_late_reply_does_not_answer_the_next_command():
+    async def handle(reader, writer):
+        # Первый #QVL отвечает с опозданием, остальные команды сразу
+        volumes = iter([b"10", b"20"])
+        while data := await reader.read(1024):
+            for line in data.split(b"\r"):
+                if line == b"#QVL":
+                    volume = next(volumes)
+                    if volume == b"10":
+                        await asyncio.sleep(0.15)
+                    writer.write(b"@QVL OK " + volume + b"\r")
+                elif line:
+                    writer.write(b"@" + line[1:4] + b" OK\r")
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        connection = OppoConnection("127.0.0.1", port, response_timeout=0.1)
+        first = await connection.async_send("#QVL", True)
+        second = await connection.async_send("#QVL", True)
+        await connection.async_close()
+        server.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is False
+    assert second.params == "20"
+
+
+def test_replies_and_updates_from_the_simulator():
+    async def run():
+        simulator = OppoSimulator()
+        port = await simulator.async_start()
+        connection = OppoConnection("127.0.0.1", port)
+        updates = []
+        connection.add_update_listener(updates.append)
+        replies = await connection.async_send_many(["#QPW", "#SVL 40", "#QIS"])
+        await asyncio.sleep(0.05)
+        await connection.async_close()
+        await simulator.async_stop()
+        return replies, updates
+
+    replies, updates = asyncio.run(run())
+    assert [(reply.code, reply.params) for reply in replies] == [
+        ("QPW", "ON"),
+        ("SVL", "40"),
+        ("QIS", "0 BD-PLAYER"),
+    ]
+    assert [(update.code, update.params) for update in updates] == [("UVL", "040")]
+
+
+def test_dropped_session_reconnects_on_demand():
+    async def run():
+        simulator = OppoSimulator()
+        port = await simulator.async_start()
+        connection = OppoConnection("127.0.0.1", port)
+        assert await connection.async_send("#QPW", True)
+        simulator.drop_clients()
+        await asyncio.sleep(0.05)
+        # Фоновое переподключение ещё ждёт своей задержки, команда открывает сессию сама
+        reply = await connection.async_send("#QPW", True)
+        await connection.async_close()
+        await simulator.async_stop()
+        return reply, simulator.connections_opened
+
+    reply, connections = asyncio.run(run())
+    assert reply.params == "ON"
+    assert connections == 2
+
+
+def test_probe():
+    async def run():
+        simulator = OppoSimulator()
+        port = await simulator.async_start()
+        status = await async_probe("127.0.0.1", port)
+        await simulator.async_stop()
+        closed = await async_probe("127.0.0.1", port)
+        return status, closed
+
+    status, closed = asyncio.run(run())
+    assert status.power is True
+    assert status.firmware == "UDP20X-56-0624"
+    assert closed is None
@@ -0,0 +1,70 @@
+"""Tests of the adaptive poll scheduler."""
+from custom_components.oppo_ipcontrol.poll_scheduler import (
+    HEALTH_CHECK_INTERVAL,
+    IDLE_INTERVAL,
+    OFF_MAX_INTERVAL,
+    OppoPollScheduler,
+)
+from custom_components.oppo_ipcontrol.protocol import (
+    QUERY_PLAYBACK,
+    QUERY_POWER,
+    QUERY_SOURCE,
+    QUERY_VOLUME,
+)
+
+ALL_QUERIES = [QUERY_POWER, QUERY_PLAYBACK, QUERY_VOLUME, QUERY_SOURCE]
+
+
+def test_everything_is_due_at_start():
+    scheduler = OppoPollScheduler()
+    assert scheduler.due_queries(0, True) == ALL_QUERIES
+    assert scheduler.due_queries(0, False) == [QUERY_POWER]
+
+
+def test_power_backoff_while_off():
+    scheduler = OppoPollScheduler(off_interval=15)
+    delays = []
+    now = 0.0
+    for _ in range(7):
+        scheduler.reschedule([QUERY_POWER], now, False, False, False)
+        delays.append(scheduler.next_delay(now, False))
+    assert delays[:4] == [15, 30, 60, 120]
+    assert max(delays) == OFF_MAX_INTERVAL
+
+
+def test_power_on_resets_backoff():
+    scheduler = OppoPollScheduler(off_interval=15)
+    for _ in range(3):
+        scheduler.reschedule([QUERY_POWER], 0, False, False, False)
+    scheduler.reschedule([QUERY_POWER], 0, True, False, False)
+    scheduler.reschedule([QUERY_POWER], 0, False, False, False)
+    assert scheduler.next_delay(0, False) == 15
+
+
+def test_playback_interval_depends_on_state_and_push():
+    scheduler = OppoPollScheduler(play_interval=2, volume_interval=60)
+    scheduler.reschedule(ALL_QUERIES, 0, True, True, False)
+    assert scheduler.next_delay(0, True) == 2
+    assert scheduler.due_queries(2, True) == [QUERY_PLAYBACK]
+    scheduler.reschedule([QUERY_PLAYBACK], 0, True, False, False)
+    assert scheduler.due_queries(IDLE_INTERVAL, True) == [
+        QUERY_POWER,
+        QUERY_PLAYBACK,
+        QUERY_SOURCE,
+    ]
+    scheduler.reschedule(ALL_QUERIES, 0, True, True, True)
+    assert scheduler.next_delay(0, True) == HEALTH_CHECK_INTERVAL
+
+
+def test_request_makes_query_due():
+    scheduler = OppoPollScheduler()
+    scheduler.reschedule(ALL_QUERIES, 0, True, False, True)
+    assert scheduler.due_queries(1, True) == []
+    scheduler.request(QUERY_VOLUME)
+    assert scheduler.due_queries(1, True) == [QUERY_VOLUME]
+    assert scheduler.next_delay(1, True) == 0
+
+
+def test_from_options():
+    scheduler = OppoPollScheduler.from_options({"off_interval": 5, "play_interval": 1})
+    assert (scheduler.off_interval, scheduler.play_interval) == (5, 1)
@@ -0,0 +1,96 @@
+"""Tests of the protocol framing and reply parsing."""
+from custom_components.oppo_ipcontrol.protocol import (
+    MAX_LINE_LENGTH,
+    QUERY_POWER,
+    QUERY_SOURCE,
+    QUERY_VOLUME,
+    OppoLineParser,
+    OppoMessage,
+    build_command,
+    parse_line,
+    parse_reply,
+    parse_status,
+    parse_status_update,
+    parse_time_code,
+)
+
+
+def test_parse_line_reply_and_update():
+    assert parse_line("@QPW OK ON") == OppoMessage("QPW", "OK", "ON")
+    assert parse_line("@SIS ER INVALID") == OppoMessage("SIS", "ER", "INVALID")
+    assert parse_line("@UPL PLAY") == OppoMessage("UPL", "", "PLAY")
+    # Verbose mode 0: без кода команды
+    assert parse_line("@OK 35") == OppoMessage(None, "OK", "35")
+    assert parse_line("garbage") is None
+
+
+def test_line_parser_splits_and_joins_chunks():
+    parser = OppoLineParser()
+    messages, rejected = parser.feed(b"@QPW OK ON\r@QVL OK 3")
+    assert messages == [OppoMessage("QPW", "OK", "ON")]
+    assert rejected == []
+    messages, rejected = parser.feed(b"5\r@UPL PAUS\r")
+    assert messages == [OppoMessage("QVL", "OK", "35"), OppoMessage("UPL", "", "PAUS")]
+    assert rejected == []
+
+
+def test_line_parser_rejects_noise_and_overlong_lines():
+    parser = OppoLineParser()
+    _messages, rejected = parser.feed(b"noise\r")
+    assert rejected == ["noise"]
+    _messages, rejected = parser.feed(b"x" * (MAX_LINE_LENGTH + 1))
+    assert len(rejected) == 1
+    # После сброса буфера следующая строка разбирается как обычно
+    messages, _rejected = parser.feed(b"\r@QPW OK OFF\r")
+    assert messages == [OppoMessage("QPW", "OK", "OFF")]
+
+
+def test_parse_status_batch():
+    queries = [QUERY_POWER, QUERY_VOLUME, QUERY_SOURCE, "#QAT", "#QST"]
+    responses = [
+        parse_line("@QPW OK ON"),
+        parse_line("@QVL OK 35"),
+        parse_line("@QIS OK 1 HDMI-IN"),
+        parse_line("@QAT OK DTS 2/5 English"),
+        parse_line("@QST OK OFF"),
+    ]
+    status = parse_status(queries, responses)
+    assert status.power is True
+    assert status.volume == 35
+    assert status.muted is False
+    assert status.source == "1"
+    assert (status.audio_type, status.audio_track, status.audio_track_count) == ("DTS", 2, 5)
+    assert status.audio_language == "English"
+    assert status.subtitle_track == 0
+
+
+def test_parse_status_skips_missing_and_rejected_replies():
+    queries = [QUERY_POWER, QUERY_VOLUME]
+    status = parse_status(queries, [None, parse_line("@QVL ER OFF")])
+    assert status.power is None
+    assert status.volume is None
+
+
+def test_parse_reply_volume_and_mute():
+    assert parse_reply("#SVL 40", parse_line("@SVL OK 40")).volume == 40
+    assert parse_reply("#QVL", parse_line("@QVL OK MUTE")).muted is True
+    assert parse_reply("#MUT", parse_line("@MUT OK UNMUTE")).muted is False
+    assert parse_reply("#MUT", None).muted is None
+
+
+def test_parse_status_update():
+    assert parse_status_update(parse_line("@UPW 1")).power is True
+    assert parse_status_update(parse_line("@UVL MUT")).muted is True
+    assert parse_status_update(parse_line("@UVL 030")).volume == 30
+    assert parse_status_update(parse_line("@UIS 1 HDMI-IN")).source == "1"
+
+
+def test_parse_time_code():
+    time_code = parse_time_code("001 003 T 00:01:23")
+    assert (time_code.title, time_code.chapter, time_code.kind, time_code.seconds) == (1, 3, "T", 83)
+    assert parse_time_code("001 003 T 1:23") is None
+
+
+def test_build_command():
+    assert build_command("set_volume", 50) == "#SVL 50"
+    assert build_command("up") == "#NUP"
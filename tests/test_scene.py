@@ -0,0 +1,80 @@
+"""Tests of the scene restore plan."""
+from custom_components.oppo_ipcontrol.scene import OppoScene, plan_restore
+
+PLAYING = OppoScene(
+    power=True,
+    source="0",
+    volume=30,
+    muted=False,
+    playback="PLAY",
+    title=1,
+    position=3600,
+    audio_track=1,
+    audio_track_count=4,
+    subtitle_track=1,
+    subtitle_track_count=3,
+)
+
+
+def _current(**changes):
+    fields = {**PLAYING.__dict__, **changes}
+    return OppoScene(**fields)
+
+
+def test_unchanged_scene_sends_nothing():
+    assert plan_restore(PLAYING, PLAYING) == []
+
+
+def test_power_is_not_planned():
+    assert plan_restore(PLAYING, OppoScene()) == []
+    assert plan_restore(OppoScene(), PLAYING) == []
+
+
+def test_input_and_volume():
+    current = _current(source="1", volume=55)
+    assert plan_restore(PLAYING, current) == ["#SIS 0", "#SVL 30"]
+
+
+def test_unmute_with_volume():
+    assert plan_restore(PLAYING, _current(muted=True)) == ["#SVL 30"]
+
+
+def test_mute_after_volume_change():
+    scene = OppoScene(power=True, volume=30, muted=True)
+    assert plan_restore(scene, OppoScene(power=True, volume=40, muted=False)) == [
+        "#SVL 30",
+        "#SVL MUTE",
+    ]
+    assert plan_restore(scene, OppoScene(power=True, volume=30, muted=True)) == []
+
+
+def test_resume_after_pause_seeks_and_plays():
+    current = _current(playback="PAUSE", position=100)
+    assert plan_restore(PLAYING, current) == ["#SRH T 1:00:00", "#PLA"]
+
+
+def test_small_position_drift_is_not_seeked():
+    assert plan_restore(PLAYING, _current(position=3601)) == []
+
+
+def test_resume_from_stop_plays_first():
+    current = _current(playback="STOP", position=None)
+    assert plan_restore(PLAYING, current) == ["#PLA", "#SRH T 1:00:00"]
+
+
+def test_tracks_are_cycled_within_the_same_title():
+    current = _current(audio_track=3, subtitle_track=0)
+    # Аудио: 3 -> 4 -> 1; субтитры: выкл -> 1
+    assert plan_restore(PLAYING, current) == ["#AUD", "#AUD", "#SUB"]
+    # В другом титуле позиция и дорожки сцены неприменимы
+    assert plan_restore(PLAYING, _current(title=2, position=10, audio_track=3)) == []
+
+
+def test_pause_scene():
+    scene = OppoScene(power=True, playback="PAUSE", position=50)
+    assert plan_restore(scene, OppoScene(power=True, playback="PLAY", position=50)) == ["#PAU"]
+
+
+def test_stop_scene():
+    scene = OppoScene(power=True, playback="STOP")
+    assert plan_restore(scene, OppoScene(power=True, playback="PLAY")) == ["#STP"]
@@ -0,0 +1,148 @@
+"""Latency and throughput benchmark for the Oppo UDP-20x integration.
+
+Runs the integration's connection layer against the local protocol
+simulator (tools/oppo_simulator.py) and reports:
+
+* commands per second and p50/p99 command latency through the command queue;
+* TCP sockets opened during each run;
+* HA state writes per minute of the media player entity over a scripted
+  playback session (requires Home Assistant to be importable; the scenario
+  is skipped otherwise).
+
+Example: ``python tools/benchmark.py --commands 1000 --duration 60 --delay 0.005``
+"""
+import argparse
+import asyncio
+import importlib
+import pathlib
+import statistics
+import sys
+import time
+import types
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
+COMPONENT_DIR = REPO_ROOT / "custom_components" / "oppo_ipcontrol"
+PACKAGE = "custom_components.oppo_ipcontrol"
+
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from oppo_simulator import OppoSimulator  # noqa: E402
+
+QUERIES = ("#QPW", "#QVL", "#QPL", "#QIS", "#QTE")
+
+
+def _load_integration():
+    """Make the integration importable; return True if Home Assistant is available."""
+    try:
+        import homeassistant  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        # Без Home Assistant подгружаем только транспортные модули, минуя __init__.py
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(COMPONENT_DIR)]
+        sys.modules[PACKAGE] = package
+        return False
+    return True
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def bench_commands(args):
+    """Send queries back to back and measure latency and throughput."""
+    connection_module = importlib.import_module(f"{PACKAGE}.connection")
+    queue_module = importlib.import_module(f"{PACKAGE}.command_queue")
+
+    simulator = OppoSimulator(delay=args.delay, drop_rate=args.drop_rate, refuse_rate=args.refuse_rate)
+    port = await simulator.async_start()
+    connection = connection_module.OppoConnection("127.0.0.1", port)
+    commands = queue_module.OppoCommandQueue(connection)
+    latencies = []
+    failures = 0
+    started = time.perf_counter()
+    for index in range(args.commands):
+        sent = time.perf_counter()
+        response = await commands.async_send(
+            QUERIES[index % len(QUERIES)], True, queue_module.PRIORITY_POLL
+        )
+        if response:
+            latencies.append(time.perf_counter() - sent)
+        else:
+            failures += 1
+    elapsed = time.perf_counter() - started
+    await commands.async_close()
+    await connection.async_close()
+    await simulator.async_stop()
+
+    print("Command latency")
+    print(f"  commands:            {args.commands} ({failures} failed)")
+    print(f"  commands/sec:        {args.commands / elapsed:.1f}")
+    if latencies:
+        print(f"  p50 latency:         {statistics.median(latencies) * 1000:.2f} ms")
+        print(f"  p99 latency:         {_percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"  sockets opened:      {simulator.connections_opened}")
+
+
+async def bench_entity(args):
+    """Run the media player entity through a scripted playback session."""
+    hub_module = importlib.import_module(f"{PACKAGE}.hub")
+    media_player = importlib.import_module(f"{PACKAGE}.media_player")
+
+    class CountingPlayer(media_player.OppoIPControlMediaPlayer):
+        """Media player that counts state writes instead of handing them to HA."""
+
+        writes = 0
+
+        def async_write_ha_state(self):
+            self.writes += 1
+
+    simulator = OppoSimulator(delay=args.delay, drop_rate=args.drop_rate, refuse_rate=args.refuse_rate)
+    port = await simulator.async_start()
+    hub = hub_module.OppoHub()
+    player = CountingPlayer("127.0.0.1", "bench", hub, "bench", port=port)
+    await player.async_added_to_hass()
+
+    started = time.perf_counter()
+    commands_before = simulator.commands_received
+    step = 0
+    while time.perf_counter() - started < args.duration:
+        await asyncio.sleep(5)
+        step += 1
+        # Сценарий: пауза/воспроизведение и изменение громкости с пульта
+        simulator._set_playback("PAUSE" if step % 2 else "PLAY")  # pylint: disable=protected-access
+        if step % 3 == 0:
+            simulator.volume = (simulator.volume + 5) % 100
+            simulator.push("UVL", f"{simulator.volume:03d}")
+    elapsed = time.perf_counter() - started
+    await player.async_will_remove_from_hass()
+    await hub.async_shutdown()
+    await simulator.async_stop()
+
+    print("Media player session")
+    print(f"  duration:            {elapsed:.0f} s")
+    print(f"  commands/min:        {(simulator.commands_received - commands_before) / elapsed * 60:.1f}")
+    print(f"  sockets opened:      {simulator.connections_opened}")
+    print(f"  state writes/min:    {player.writes / elapsed * 60:.1f}")
+
+
+async def _main(args):
+    has_homeassistant = _load_integration()
+    await bench_commands(args)
+    if args.duration <= 0:
+        return
+    if has_homeassistant:
+        await bench_entity(args)
+    else:
+        print("Media player session skipped: homeassistant is not installed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=60, help="entity session length, 0 to skip")
+    parser.add_argument("--delay", type=float, default=0.0, help="simulated reply delay (s)")
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--refuse-rate", type=float, default=0.0)
+    asyncio.run(_main(parser.parse_args()))
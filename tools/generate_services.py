@@ -0,0 +1,54 @@
+"""Regenerate the send_command presets in services.yaml from the command table.
+
+The preset list of the ``send_command`` service mirrors the remote keys of
+``protocol.COMMANDS``; run this after changing the table::
+
+    python tools/generate_services.py
+"""
+import pathlib
+import sys
+import types
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
+COMPONENT_DIR = REPO_ROOT / "custom_components" / "oppo_ipcontrol"
+PACKAGE = "custom_components.oppo_ipcontrol"
+SERVICES_YAML = COMPONENT_DIR / "services.yaml"
+
+OPTIONS_START = "          options:\n"
+OPTIONS_END = "          mode: dropdown\n"
+
+
+def _load_protocol():
+    """Import protocol.py without importing Home Assistant."""
+    sys.path.insert(0, str(REPO_ROOT))
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(COMPONENT_DIR)]
+    sys.modules[PACKAGE] = package
+    from custom_components.oppo_ipcontrol import protocol  # pylint: disable=import-outside-toplevel
+
+    return protocol
+
+
+def render_options(protocol):
+    """Return the selector options for every remote key of the command table."""
+    lines = [OPTIONS_START]
+    for command in protocol.COMMANDS.values():
+        if command.kind != protocol.KIND_KEY:
+            continue
+        lines.append(f'            - label: "{command.label}"\n')
+        lines.append(f'              value: "{command.name}"\n')
+    return "".join(lines)
+
+
+def main():
+    protocol = _load_protocol()
+    text = SERVICES_YAML.read_text(encoding="utf-8")
+    # Заменяем только первый (действующий) блок send_command
+    start = text.index(OPTIONS_START, text.index("send_command:"))
+    end = text.index(OPTIONS_END, start)
+    SERVICES_YAML.write_text(text[:start] + render_options(protocol) + text[end:], encoding="utf-8")
+    print(f"Updated {SERVICES_YAML.relative_to(REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
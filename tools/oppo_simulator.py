@@ -0,0 +1,283 @@
+"""Local stand-in for an Oppo UDP-20x player speaking the IP Control Protocol.
+
+Implements the query/command grammar of the bundled protocol PDF closely
+enough to exercise the integration without a physical player: verbose
+modes 0-3 (including the unsolicited @U.. updates and the per-second @UTC
+time code), power, volume, input, playback, disc information and the
+navigation keys. Faults can be injected to test the connection layer:
+
+* ``delay``: seconds to wait before every reply;
+* ``drop_rate``: probability that a command closes the connection instead
+  of being answered;
+* ``refuse_rate``: probability that a new connection is reset right after
+  it was accepted.
+
+Run standalone with ``python tools/oppo_simulator.py --port 2323``.
+"""
+import argparse
+import asyncio
+import logging
+import random
+
+_LOGGER = logging.getLogger(__name__)
+
+SOURCES = {
+    "0": "BD-PLAYER",
+    "1": "HDMI-IN",
+    "2": "ARC-HDMI-OUT",
+    "3": "OPTICAL-IN",
+    "4": "COAXIAL-IN",
+    "5": "USB-AUDIO-IN",
+}
+# Ответы #QPL и соответствующие коды @UPL
+PLAYBACK_UPDATES = {
+    "PLAY": "PLAY",
+    "PAUSE": "PAUS",
+    "STOP": "STOP",
+    "HOME MENU": "HOME",
+}
+NAVIGATION_KEYS = {
+    "NUP", "NDN", "NLT", "NRT", "SEL", "HOM", "RET", "SET", "OSD", "TTL",
+    "MNU", "PUP", "PDN", "RED", "GRN", "BLU", "YLW", "OPT", "CLR", "GOT",
+    "AUD", "SUB", "ANG", "ZOM", "NOP", "SRC", "NU0", "NU1", "NU2", "NU3",
+    "NU4", "NU5", "NU6", "NU7", "NU8", "NU9",
+}
+TITLE_LENGTH = 2 * 3600
+
+
+def _format_time(seconds):
+    seconds = max(int(seconds), 0)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class OppoSimulator:
+    """Simulated player state plus a TCP server that serves it."""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, drop_rate=0.0, refuse_rate=0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.drop_rate = drop_rate
+        self.refuse_rate = refuse_rate
+        self.power = True
+        self.volume = 30
+        self.muted = False
+        self.source = "0"
+        self.playback = "HOME MENU"
+        self.disc_type = "UHBD"
+        self.title = 1
+        self.chapter = 1
+        self.elapsed = 0.0
+        self.connections_opened = 0
+        self.commands_received = 0
+        self._server = None
+        self._clients = {}
+        self._clock_task = None
+
+    async def async_start(self):
+        """Start listening; returns the bound port."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._clock_task = asyncio.create_task(self._clock())
+        return self.port
+
+    async def async_stop(self):
+        """Stop the server and drop every client."""
+        if self._clock_task is not None:
+            self._clock_task.cancel()
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._clients):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    def drop_clients(self):
+        """Close every open client connection (e.g. the player rebooted)."""
+        for writer in list(self._clients):
+            writer.close()
+
+    def push(self, code, params):
+        """Send an unsolicited status update to clients in verbose mode 2 or 3."""
+        self._broadcast(f"@{code} {params}", min_mode=2)
+
+    def _broadcast(self, line, min_mode):
+        for writer, mode in list(self._clients.items()):
+            if mode >= min_mode and not writer.is_closing():
+                writer.write(f"{line}\r".encode())
+
+    async def _clock(self):
+        """Advance playback time and send @UTC time codes in verbose mode 3."""
+        while True:
+            await asyncio.sleep(1)
+            if self.power and self.playback == "PLAY":
+                self.elapsed = min(self.elapsed + 1, TITLE_LENGTH)
+                self._broadcast(
+                    f"@UTC {self.title:03d} {self.chapter:03d} T {_format_time(self.elapsed)}",
+                    min_mode=3,
+                )
+
+    async def _handle_client(self, reader, writer):
+        self.connections_opened += 1
+        if random.random() < self.refuse_rate:
+            writer.transport.abort()
+            return
+        self._clients[writer] = 0
+        try:
+            while True:
+                line = await reader.readuntil(b"\r")
+                command = line.decode(errors="replace").strip()
+                if not command:
+                    continue
+                self.commands_received += 1
+                if random.random() < self.drop_rate:
+                    writer.transport.abort()
+                    return
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                reply = self._execute(writer, command)
+                if reply is not None:
+                    writer.write(f"{reply}\r".encode())
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # Клиент отключился или сервер остановлен
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    def _execute(self, writer, command):
+        """Run one command and return the reply line."""
+        if not command.startswith("#") or len(command) < 4:
+            return None
+        code, _, params = command[1:].partition(" ")
+        code = code.upper()
+        result, reply = self._dispatch(writer, code, params.strip())
+        mode = self._clients.get(writer, 0)
+        text = f"{result} {reply}".rstrip()
+        return f"@{text}" if mode == 0 else f"@{code} {text}"
+
+    def _dispatch(self, writer, code, params):
+        if code == "SVM":
+            if params not in ("0", "1", "2", "3"):
+                return "ER", "INVALID"
+            self._clients[writer] = int(params)
+            return "OK", params
+        if code == "QVM":
+            return "OK", str(self._clients.get(writer, 0))
+        if code == "QPW":
+            return "OK", "ON" if self.power else "OFF"
+        if code == "QVR":
+            return "OK", "UDP20X-56-0624"
+        if code in ("PON", "POF", "POW"):
+            power = {"PON": True, "POF": False}.get(code, not self.power)
+            if power != self.power:
+                self.power = power
+                self.push("UPW", "1" if power else "0")
+            return "OK", "ON" if self.power else "OFF"
+        if not self.power:
+            return "ER", "OFF"
+        if code == "QVL":
+            return "OK", "MUTE" if self.muted else str(self.volume)
+        if code in ("VUP", "VDN", "SVL"):
+            if code == "SVL":
+                if params == "MUTE":
+                    return self._set_mute(True)
+                if not params.isdigit() or not 0 <= int(params) <= 100:
+                    return "ER", "INVALID"
+                volume = int(params)
+            else:
+                volume = self.volume + (1 if code == "VUP" else -1)
+            self.volume = max(0, min(100, volume))
+            self.muted = False
+            self.push("UVL", f"{self.volume:03d}")
+            return "OK", str(self.volume)
+        if code == "MUT":
+            return self._set_mute(not self.muted)
+        if code in ("QIS", "SIS"):
+            if code == "SIS":
+                if params not in SOURCES:
+                    return "ER", "INVALID"
+                self.source = params
+                self.push("UIS", f"{params} {SOURCES[params]}")
+            return "OK", f"{self.source} {SOURCES[self.source]}"
+        if code == "QPL":
+            return "OK", self.playback
+        if code in ("PLA", "PAU", "STP"):
+            self._set_playback({"PLA": "PLAY", "PAU": "PAUSE", "STP": "STOP"}[code])
+            return "OK", ""
+        if code in ("NXT", "PRE"):
+            self.chapter = max(1, self.chapter + (1 if code == "NXT" else -1))
+            return "OK", ""
+        if code == "SRH":
+            kind, _, value = params.partition(" ")
+            parts = value.split(":")
+            if kind != "T" or len(parts) != 3 or not all(part.isdigit() for part in parts):
+                return "ER", "INVALID"
+            self.elapsed = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+            return "OK", ""
+        if code in ("QTE", "QEL"):
+            return "OK", _format_time(self.elapsed)
+        if code in ("QTR", "QRE"):
+            return "OK", _format_time(TITLE_LENGTH - self.elapsed)
+        if code == "QCE":
+            return "OK", _format_time(self.elapsed % 600)
+        if code == "QCR":
+            return "OK", _format_time(600 - self.elapsed % 600)
+        if code == "QTK":
+            return "OK", f"{self.title:02d}/03"
+        if code == "QCH":
+            return "OK", f"{self.chapter:02d}/24"
+        if code == "QDT":
+            return "OK", self.disc_type
+        if code == "QAT":
+            return "OK", "DTS-HD 1/4 English"
+        if code == "QST":
+            return "OK", "1/3 English"
+        if code == "QHD":
+            return "OK", "UHD24"
+        if code == "QHS":
+            return "OK", "HDR"
+        if code == "QAR":
+            return "OK", "16WW"
+        if code == "EJT":
+            self.disc_type = "NO-DISC"
+            self._set_playback("STOP")
+            self.push("UPL", "OPEN")
+            return "OK", "OPEN"
+        if code in NAVIGATION_KEYS:
+            return "OK", ""
+        return "ER", "INVALID"
+
+    def _set_mute(self, muted):
+        self.muted = muted
+        self.push("UVL", "MUT" if muted else f"{self.volume:03d}")
+        return "OK", "MUTE" if muted else "UNMUTE"
+
+    def _set_playback(self, playback):
+        if playback != self.playback:
+            self.playback = playback
+            self.push("UPL", PLAYBACK_UPDATES.get(playback, playback[:4]))
+
+
+async def _main(args):
+    simulator = OppoSimulator(
+        args.host, args.port, args.delay, args.drop_rate, args.refuse_rate
+    )
+    port = await simulator.async_start()
+    _LOGGER.info("Oppo simulator listening on %s:%s", args.host, port)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--refuse-rate", type=float, default=0.0)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass